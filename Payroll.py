@@ -1,14 +1,32 @@
 import pandas as pd
 import tkinter as tk
-from tkinter import filedialog, messagebox, ttk
-from fpdf import FPDF
-import smtplib
-from email.message import EmailMessage
-import ssl
+from tkinter import filedialog, messagebox, simpledialog, ttk
 import os
 import json
 from pathlib import Path
 
+import batch_runner
+import mailer
+import report_engine
+import report_export
+import streaming_diff
+from change_history import ChangeHistory, file_period
+from report_cache import ReportCache
+from report_viewer import VirtualTreeview
+from dataset_cache import DatasetCache, file_signature
+from instrumentation import stage
+from job_runner import JobRunner
+from search_index import SearchCursor, SearchIndex
+from snapshot_store import SnapshotStore
+
+# Export menu entry: (label for dialogs and messages, file extension)
+EXPORT_TYPES = {
+    "Export as CSV": ("CSV", ".csv"),
+    "Export as compressed CSV (.gz)": ("Compressed CSV", ".csv.gz"),
+    "Export as Excel": ("Excel", ".xlsx"),
+    "Export as PDF": ("PDF", ".pdf"),
+}
+
 class PayrollApp:
     def __init__(self, root):
         self.root = root
@@ -18,6 +36,15 @@ class PayrollApp:
         self.master_path = tk.StringVar()
         self.changes_path = tk.StringVar()
         self.latest_df = pd.DataFrame()
+        self.latest_source = None
+        self.snapshots = SnapshotStore()
+        self.dataset_cache = DatasetCache(reader=self.snapshots.read)
+        self.report_cache = ReportCache()
+        self.current_diff = None
+        self.current_diff_key = None
+        self.history = ChangeHistory(file_hash=self.report_cache.file_hash)
+        self.search_index = None
+        self.search_cursor = SearchCursor()
         self.password_visible = False
         self.actual_password = ""
         self.style = ttk.Style()
@@ -26,8 +53,11 @@ class PayrollApp:
         self.style.configure("TLabel", font=("Segoe UI", 10))
         self.style.configure("Treeview.Heading", font=("Segoe UI", 10, "bold"), background="#0078D7", foreground="white")
         self.credentials_file = Path.home() / ".bsp_payroll_credentials.json"
+        self.delivery_log_file = Path.home() / "bsp_payroll_delivery_log.csv"
         self.saved_credentials = self.load_credentials()
         self.setup_ui()
+        self.jobs = JobRunner(self.root, on_status=self.status_var.set, on_timings=self.timings_var.set)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
         env_email = os.getenv("EMAIL_USER")
         env_pass = os.getenv("EMAIL_PASS")
 
@@ -94,6 +124,11 @@ class PayrollApp:
         )
 
     def setup_ui(self):
+        # Packed first so the expanding main frame cannot push it off the window
+        self.timings_var = tk.StringVar()
+        tk.Label(self.root, textvariable=self.timings_var, anchor="w", relief=tk.SUNKEN, bg="#e8f1fa",
+                 fg="#003366", font=("Segoe UI", 9)).pack(side=tk.BOTTOM, fill=tk.X)
+
         frame = tk.Frame(self.root, bg="#f4faff", bd=2, relief="groove")
         frame.pack(padx=20, pady=20, fill=tk.BOTH, expand=True)
         
@@ -130,20 +165,29 @@ class PayrollApp:
         dropdown_frame = tk.Frame(frame, bg="#f4faff")
         dropdown_frame.pack(pady=(10, 5))
         self.report_option = tk.StringVar()
-        report_list = ["Generate Count Report", "Generate Changes Report", "Generate New Joinee Report"]
+        report_list = [
+            "Generate Count Report", "Generate Changes Report", "Generate New Joinee Report",
+            "Employee Change History", "Column Change Trend", "Repeat Change Flags",
+        ]
         self.report_combobox = ttk.Combobox(dropdown_frame, textvariable=self.report_option, values=report_list, state="readonly", width=35)
         self.report_combobox.pack(side=tk.LEFT, padx=5)
         ttk.Button(dropdown_frame, text="Select", command=self.run_selected_report).pack(side=tk.LEFT, padx=5)
+        ttk.Button(dropdown_frame, text="Batch Run", command=self.run_batch).pack(side=tk.LEFT, padx=5)
+        ttk.Button(dropdown_frame, text="Cancel", command=self.cancel_jobs).pack(side=tk.LEFT, padx=5)
+        self.status_var = tk.StringVar(value="Ready")
+        tk.Label(dropdown_frame, textvariable=self.status_var, bg="#f4faff", fg="#003366", width=45, anchor="w").pack(side=tk.LEFT, padx=5)
 
         tree_frame = tk.LabelFrame(frame, text="Report Viewer", bg="#f4faff", font=("Segoe UI", 10, "bold"), fg="#003366")
         tree_frame.pack(padx=10, pady=(10, 0), fill=tk.BOTH, expand=True)
         self.tree = ttk.Treeview(tree_frame, show="headings")
-        vsb = ttk.Scrollbar(tree_frame, orient="vertical", command=self.tree.yview)
+        vsb = ttk.Scrollbar(tree_frame, orient="vertical")
         hsb = ttk.Scrollbar(tree_frame, orient="horizontal", command=self.tree.xview)
-        self.tree.configure(yscrollcommand=vsb.set, xscrollcommand=hsb.set)
+        self.tree.configure(xscrollcommand=hsb.set)
         self.tree.grid(row=0, column=0, sticky="nsew")
         vsb.grid(row=0, column=1, sticky="ns")
         hsb.grid(row=1, column=0, sticky="ew")
+        self.viewer = VirtualTreeview(self.tree, vsb)
+        self.tree.bind("<Double-1>", self.show_employee_record)
         tree_frame.grid_rowconfigure(0, weight=1)
         tree_frame.grid_columnconfigure(0, weight=1)
 
@@ -151,14 +195,20 @@ class PayrollApp:
         search_frame.pack(pady=(10, 5), anchor="e")
         tk.Label(search_frame, text="Search:", bg="#f4faff").pack(side=tk.LEFT)
         self.search_var = tk.StringVar()
-        tk.Entry(search_frame, textvariable=self.search_var).pack(side=tk.LEFT, padx=5)
+        search_entry = tk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, padx=5)
+        search_entry.bind("<Return>", lambda event: self.search_report())
         ttk.Button(search_frame, text="Find", command=self.search_report).pack(side=tk.LEFT)
+        ttk.Button(search_frame, text="Prev", command=self.search_previous).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Button(search_frame, text="Next", command=self.search_report).pack(side=tk.LEFT, padx=(5, 0))
+        self.match_var = tk.StringVar()
+        tk.Label(search_frame, textvariable=self.match_var, bg="#f4faff", width=14).pack(side=tk.LEFT)
 
         export_frame = tk.Frame(frame, bg="#f4faff")
         export_frame.pack(pady=(10, 5))
         self.export_option = tk.StringVar()
-        export_list = ["Export as CSV", "Export as PDF"]
-        self.export_combobox = ttk.Combobox(export_frame, textvariable=self.export_option, values=export_list, state="readonly", width=25)
+        export_list = list(EXPORT_TYPES)
+        self.export_combobox = ttk.Combobox(export_frame, textvariable=self.export_option, values=export_list, state="readonly", width=30)
         self.export_combobox.pack(side=tk.LEFT, padx=5)
         ttk.Button(export_frame, text="Export", command=self.run_export).pack(side=tk.LEFT, padx=5)
 
@@ -207,18 +257,38 @@ class PayrollApp:
         self.eye_button.pack(side=tk.LEFT, padx=(0,5))
         
         ttk.Button(email_frame, text="Send Email", command=self.send_email).pack(side=tk.LEFT, padx=5)
+        ttk.Button(email_frame, text="Bulk Send", command=self.bulk_send_email).pack(side=tk.LEFT, padx=5)
 
     def search_report(self):
-        query = self.search_var.get().lower()
-        if not query:
-            return
-        for row in self.tree.get_children():
-            values = self.tree.item(row, "values")
-            if any(query in str(value).lower() for value in values):
-                self.tree.selection_set(row)
-                self.tree.focus(row)
-                self.tree.see(row)
-                break
+        """Jump to the next row matching the search box, starting a new search if the query changed"""
+        cursor = self.search_cursor_for(self.search_var.get())
+        if cursor is not None:
+            self.show_match(cursor.next())
+
+    def search_previous(self):
+        cursor = self.search_cursor_for(self.search_var.get())
+        if cursor is not None:
+            self.show_match(cursor.previous())
+
+    def search_cursor_for(self, query):
+        if not query or self.latest_df.empty:
+            self.match_var.set("")
+            return None
+        if self.search_cursor.query != query:
+            if self.search_index is None:
+                self.search_index = SearchIndex(self.latest_df)
+            self.search_cursor = SearchCursor(query, self.search_index.search(query))
+        return self.search_cursor
+
+    def show_match(self, position):
+        if position is not None:
+            self.viewer.see(position)
+        self.match_var.set(self.search_cursor.describe())
+
+    def set_search_index(self, df, index):
+        # Ignore an index that finished building after another report replaced df
+        if df is self.latest_df:
+            self.search_index = index
 
     def load_master(self):
         """Load master payroll file with more flexible file selection"""
@@ -286,95 +356,104 @@ class PayrollApp:
             self.generate_changes_report()
         elif choice == "Generate New Joinee Report":
             self.generate_new_joinee_report()
-
-    def display_report(self, df):
+        elif choice == "Employee Change History":
+            self.generate_employee_history()
+        elif choice == "Column Change Trend":
+            self.start_report(lambda job, *paths: self.history.column_trend(), "column change trend")
+        elif choice == "Repeat Change Flags":
+            self.start_report(lambda job, *paths: self.history.repeat_changes(), "repeat change flags")
+
+    def display_report(self, df, source=None):
+        """Show ``df``; ``source`` is the (master, changes) paths it was built from, if any"""
         self.latest_df = df
-        self.tree.delete(*self.tree.get_children())
-        self.tree["columns"] = list(df.columns)
-        for col in df.columns:
-            self.tree.heading(col, text=col)
-            max_len = max(df[col].astype(str).map(len).max(), len(col))
-            pixel_width = min(max_len * 8, 300)
-            self.tree.column(col, width=pixel_width, anchor='center', minwidth=220, stretch=True)
-        for _, row in df.iterrows():
-            self.tree.insert("", "end", values=list(row))
+        self.latest_source = source
+        with stage("display", rows=len(df)):
+            self.viewer.set_dataframe(df)
+        self.search_index = None
+        self.search_cursor = SearchCursor()
+        self.match_var.set("")
+        self.jobs.submit(
+            "index", "Indexing report", lambda job: SearchIndex(df),
+            on_success=lambda index: self.set_search_index(df, index), show_timings=False,
+        )
+
+    def show_employee_record(self, event=None):
+        """Pop up the old and new record of the employee on the selected row"""
+        position = self.viewer.selected_row()
+        df = self.latest_df
+        if position is None or report_engine.KEY_COLUMN not in df.columns or self.latest_source is None:
+            return
+        key = df[report_engine.KEY_COLUMN].iloc[position]
+        master_path, changes_path = self.latest_source
+        try:
+            signatures = (file_signature(master_path), file_signature(changes_path))
+        except OSError as e:
+            messagebox.showerror("Employee Record", f"The compared files are no longer readable:\n{e}")
+            return
+        if self.current_diff is not None and self.current_diff_key == signatures:
+            self.open_employee_record(self.current_diff, key)
+            return
+        # The report came from the report cache or an earlier pair; compare its files first
+        job = self.jobs.submit(
+            "record", f"Comparing files for {report_engine.KEY_COLUMN} {key}", self.load_diff, master_path, changes_path,
+            on_success=lambda diff: self.open_employee_record(diff, key),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to compare files:\n{e}"),
+        )
+        if job is None:
+            messagebox.showinfo("Busy", "An employee record is already being loaded.")
+
+    def open_employee_record(self, diff, key):
+        """Window listing every column of one employee, old and new, with changes highlighted"""
+        if isinstance(diff, streaming_diff.StreamingDiff):
+            messagebox.showinfo("Employee Record", "Record lookup is not available for files compared out-of-core.")
+            return
+        record = diff.employee_record(key)
+        if record is None:
+            messagebox.showinfo("Employee Record", f"{report_engine.KEY_COLUMN} {key} is not in the compared files.")
+            return
+
+        window = tk.Toplevel(self.root)
+        window.title(f"{report_engine.KEY_COLUMN} {key}")
+        window.configure(bg="#f4faff")
+        tree = ttk.Treeview(window, columns=list(record.columns), show="headings", height=20)
+        scrollbar = ttk.Scrollbar(window, orient="vertical", command=tree.yview)
+        tree.configure(yscrollcommand=scrollbar.set)
+        for col in record.columns:
+            tree.heading(col, text=col)
+            tree.column(col, width=220, anchor="w")
+        tree.tag_configure("changed", background="#ffe9b3")
+        for column, old, new in record.itertuples(index=False):
+            changed = not (pd.isna(old) and pd.isna(new)) and (pd.isna(old) or pd.isna(new) or old != new)
+            tree.insert("", "end", values=(column, old, new), tags=("changed",) if changed else ())
+        tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
 
     def run_export(self):
         if self.latest_df.empty:
             messagebox.showwarning("Warning", "Please generate a report first.")
             return
         choice = self.export_option.get()
-        if choice == "Export as CSV":
-            self.export_csv()
-        elif choice == "Export as PDF":
-            self.export_pdf()
-
-    def export_csv(self):
-        path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
-        if path:
-            self.latest_df.to_csv(path, index=False)
-            messagebox.showinfo("Exported", f"CSV saved at:\n{path}")
-
-    def export_pdf(self):
-        try:
-            path = filedialog.asksaveasfilename(defaultextension=".pdf", filetypes=[("PDF Files", "*.pdf")])
-            if not path:
-                return
-            pdf = FPDF(orientation='L', unit='mm', format='A4')
-            pdf.set_auto_page_break(auto=True, margin=10)
-            pdf.set_font("Arial", size=6)
-            columns = list(self.latest_df.columns)
-            usable_width = 290
-            rows = self.latest_df.values.tolist()
-
-            for i in range(0, len(columns), 10):
-                subset_cols = columns[i:i+10]
-                subset_df = self.latest_df[subset_cols]
-                pdf.add_page()
-                cell_width = max(25, usable_width / len(subset_cols))
-                for col in subset_cols:
-                    pdf.cell(cell_width, 6, str(col)[:15], border=1)
-                pdf.ln()
-                for _, row in subset_df.iterrows():
-                    for item in row:
-                        text = str(item)
-                        text = text[:15] + "..." if len(text) > 18 else text
-                        pdf.cell(cell_width, 6, text, border=1)
-                    pdf.ln()
-            pdf.output(path)
-            messagebox.showinfo("Exported", f"PDF saved at:\n{path}")
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to export PDF:\n{e}")
+        if choice in EXPORT_TYPES:
+            self.export_report(*EXPORT_TYPES[choice])
 
-    def export_pdf_to_file(self, filename):
-        """Export the current report to PDF without showing save dialog"""
-        try:
-            pdf = FPDF(orientation='L', unit='mm', format='A4')
-            pdf.set_auto_page_break(auto=True, margin=10)
-            pdf.set_font("Arial", size=6)
-            columns = list(self.latest_df.columns)
-            usable_width = 290
-            rows = self.latest_df.values.tolist()
-
-            for i in range(0, len(columns), 10):
-                subset_cols = columns[i:i+10]
-                subset_df = self.latest_df[subset_cols]
-                pdf.add_page()
-                cell_width = max(25, usable_width / len(subset_cols))
-                for col in subset_cols:
-                    pdf.cell(cell_width, 6, str(col)[:15], border=1)
-                pdf.ln()
-                for _, row in subset_df.iterrows():
-                    for item in row:
-                        text = str(item)
-                        text = text[:15] + "..." if len(text) > 18 else text
-                        pdf.cell(cell_width, 6, text, border=1)
-                    pdf.ln()
-            pdf.output(filename)
-            return True
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to create PDF: {str(e)}")
-            return False
+    def export_report(self, label, extension):
+        path = filedialog.asksaveasfilename(defaultextension=extension, filetypes=[(f"{label} Files", f"*{extension}")])
+        if not path:
+            return
+        if extension.endswith(".gz") and not path.lower().endswith(".gz"):
+            # The dialog keeps a typed ".csv" as is, which would lose the compression
+            path += ".gz"
+        job = self.jobs.submit(
+            "export", f"Exporting {label}",
+            lambda job, df: report_export.export_report(
+                df, path, progress=lambda fraction: job.progress(f"Writing {label}", fraction),
+            ),
+            self.latest_df,
+            on_success=lambda _: messagebox.showinfo("Exported", f"{label} saved at:\n{path}"),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to export {label}:\n{e}"),
+        )
+        if job is None:
+            messagebox.showinfo("Busy", "An export is already running.")
 
     def send_email(self):
         if self.latest_df.empty:
@@ -393,156 +472,211 @@ class PayrollApp:
         if not self.save_credentials():
             messagebox.showwarning("Warning", "Could not save credentials for future use.")
 
+        job = self.jobs.submit(
+            "email", "Sending email", self.deliver_email,
+            self.latest_df, self.report_option.get(), attachment_format,
+            sender_email, password, recipient_email,
+            on_success=lambda subject: messagebox.showinfo("Success", f"{subject} sent successfully to {recipient_email}!"),
+            on_error=lambda e: messagebox.showerror("Email Error", f"Failed to send email: {str(e)}"),
+        )
+        if job is None:
+            messagebox.showinfo("Busy", "An email is already being sent.")
+
+    def deliver_email(self, job, df, report_type, attachment_format, sender_email, password, recipient_email):
+        """Build attachments in memory and send the report; runs on a worker thread"""
+        base_name, email_subject = mailer.report_names(report_type)
+        job.progress("Building attachments")
+        attachments = mailer.build_attachments(
+            df, attachment_format, base_name,
+            progress=lambda fraction: job.progress("Rendering PDF", fraction),
+        )
+        msg = mailer.build_message(sender_email, recipient_email, email_subject, attachments)
+        job.progress("Sending email")
+        mailer.send_message(msg, sender_email, password)
+        return email_subject
 
-        try:
-            report_type = self.report_option.get()
-            
-            
-            if report_type == "Generate Count Report":
-                base_name = "Employee_Count_Report"
-                email_subject = "Employee Count Analysis Report"
-            elif report_type == "Generate Changes Report":
-                base_name = "Employee_Changes_Report"
-                email_subject = "Employee Changes Report"
-            elif report_type == "Generate New Joinee Report":
-                base_name = "New_Joinees_Report"
-                email_subject = "New Employee Joining Report"
-            else:
-                base_name = "Payroll_Report"
-                email_subject = "Payroll Data Report"
-
-            
-            attachments = []
-            formats_included = []
-            
-            if attachment_format in ["CSV only", "Both CSV and PDF"]:
-                csv_file = f"{base_name}.csv"
-                self.latest_df.to_csv(csv_file, index=False)
-                attachments.append(csv_file)
-                formats_included.append("CSV")
-            
-            if attachment_format in ["PDF only", "Both CSV and PDF"]:
-                pdf_file = f"{base_name}.pdf"
-                if self.export_pdf_to_file(pdf_file):
-                    attachments.append(pdf_file)
-                    formats_included.append("PDF")
-                else:
-                    if not attachments:  
-                        return
-
-           
-            msg = EmailMessage()
-            msg['Subject'] = f'BSP Payroll System - {email_subject}'
-            msg['From'] = sender_email
-            msg['To'] = recipient_email
-            
-            
-            if len(formats_included) == 2:
-                body = f"""Dear Recipient,
+    def bulk_send_email(self):
+        """Send each recipient its own slice of the current report"""
+        if self.latest_df.empty:
+            messagebox.showwarning("Warning", "Generate a report first.")
+            return
 
-Please find attached the {email_subject} in both CSV and PDF formats.
+        sender_email = self.sender_entry.get()
+        password = self.password_entry.get()
+        if not all([sender_email, password]):
+            messagebox.showwarning("Missing Info", "Your Gmail and password are required.")
+            return
 
-Regards,
-BSP Payroll Team"""
+        try:
+            if mailer.EMAIL_COLUMN in self.latest_df.columns:
+                slices = mailer.split_by_recipient(self.latest_df)
             else:
-                format_type = formats_included[0]
-                body = f"""Dear Recipient,
-
-Please find attached the {email_subject} in {format_type} format.
-
-Regards,
-BSP Payroll Team"""
-            
-            msg.set_content(body)
-
-            
-            for file in attachments:
-                with open(file, 'rb') as f:
-                    file_data = f.read()
-                    if file.endswith('.pdf'):
-                        maintype = 'application'
-                        subtype = 'pdf'
-                    else:
-                        maintype = 'text'
-                        subtype = 'csv'
-                    msg.add_attachment(file_data, maintype=maintype, subtype=subtype, filename=file)
-
-            
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL('smtp.gmail.com', 465, context=context) as server:
-                server.login(sender_email, password)
-                server.send_message(msg)
-
-            messagebox.showinfo("Success", f"{email_subject} sent successfully to {recipient_email}!")
-            
-            
-            for file in attachments:
-                if os.path.exists(file):
-                    os.remove(file)
-                    
+                path = filedialog.askopenfilename(
+                    title="Select Recipient Mapping File (key column + EMAIL)",
+                    filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")],
+                )
+                if not path:
+                    return
+                mapping, key_column = mailer.load_recipient_mapping(path)
+                slices = mailer.split_by_recipient(self.latest_df, mapping, key_column)
         except Exception as e:
-            messagebox.showerror("Email Error", f"Failed to send email: {str(e)}")
-            
-            for file in attachments:
-                if os.path.exists(file):
-                    os.remove(file)
+            messagebox.showerror("Bulk Send Error", f"Failed to read recipients:\n{e}")
+            return
+        if not slices:
+            messagebox.showwarning("Warning", "No report rows matched any recipient.")
+            return
 
-    def generate_count_report(self):
+        base_name, email_subject = mailer.report_names(self.report_option.get())
+        # Tk variables may only be read on the Tk thread
+        attachment_format = self.attachment_option.get()
+        job = self.jobs.submit(
+            "email", "Sending bulk email",
+            lambda job: mailer.bulk_send(
+                slices, sender_email, password, email_subject, base_name,
+                attachment_format=attachment_format,
+                log_path=self.delivery_log_file,
+                progress=lambda done, total: job.progress("Sending bulk email", done / total),
+            ),
+            on_success=self.show_bulk_summary,
+            on_error=lambda e: messagebox.showerror("Bulk Send Error", f"Failed to send emails: {str(e)}"),
+        )
+        if job is None:
+            messagebox.showinfo("Busy", "An email is already being sent.")
+
+    def show_bulk_summary(self, records):
+        failed = [record for record in records if record.status != "sent"]
+        summary = f"Sent {len(records) - len(failed)} of {len(records)} emails.\n\nDelivery log:\n{self.delivery_log_file}"
+        if failed:
+            summary += "\n\nFailed:\n" + "\n".join(f"{r.recipient}: {r.error}" for r in failed[:10])
+            messagebox.showwarning("Bulk Send", summary)
+        else:
+            messagebox.showinfo("Bulk Send", summary)
+
+    def load_diff(self, job, master_path, changes_path):
+        """Comparison of the given files, recomputed only when either file changes"""
+        key = (file_signature(master_path), file_signature(changes_path))
+        if self.current_diff is None or self.current_diff_key != key:
+            self.current_diff = streaming_diff.compare_files(
+                master_path, changes_path, read=self.dataset_cache.get, progress=job.progress,
+                fingerprints=self.snapshots.fingerprints,
+            )
+            self.current_diff_key = key
+        return self.current_diff
+
+    def cached_report(self, job, report, master_path, changes_path, build):
+        """(``build()``, False), or (the stored frame, True) if this report of these files was built before"""
+        job.progress("Checking report cache")
+        with stage("report cache lookup"):
+            key = self.report_cache.key(master_path, changes_path, report)
+            df = self.report_cache.get(key)
+        if df is not None:
+            return df, True
+        df = build()
         try:
-            master_df = pd.read_csv(self.master_path.get())
-            changes_df = pd.read_csv(self.changes_path.get())
-            merged = pd.merge(master_df, changes_df, on="UNIT_PERNO", suffixes=("_old", "_new"))
-            changes = []
+            with stage("report cache store", rows=len(df)):
+                self.report_cache.put(key, df)
+        except OSError:
+            # A full or read-only cache directory should not cost the report
+            pass
+        return df, False
+
+    def load_new_joinees(self, job, master_path, changes_path):
+        """New joinees from the current diff, or from column-projected snapshot loads"""
+        key = (file_signature(master_path), file_signature(changes_path))
+        if self.current_diff is not None and self.current_diff_key == key:
+            return self.current_diff.new_joinee_report()
+        job.progress("Reading input columns")
+        master_df = self.snapshots.read(master_path, [report_engine.KEY_COLUMN])
+        changes_df = self.snapshots.read(changes_path, [report_engine.KEY_COLUMN] + report_engine.NEW_JOINEE_COLUMNS)
+        return report_engine.new_joinee_report(master_df, changes_df)
+
+    def start_report(self, build, label):
+        """Run ``build(job, master_path, changes_path)`` in the background and display its result"""
+        master_path, changes_path = self.master_path.get(), self.changes_path.get()
+        job = self.jobs.submit(
+            "report", f"Generating {label}", build, master_path, changes_path,
+            on_success=lambda df: self.display_report(df, (master_path, changes_path)),
+            on_error=lambda e: messagebox.showerror("Error", f"Failed to generate {label}:\n{e}"),
+        )
+        if job is None:
+            messagebox.showinfo("Busy", "A report is already being generated.")
 
-            for col in set(master_df.columns).intersection(changes_df.columns):
-                if col in ("UNIT_PERNO", "YYYYMM"):
-                    continue
+    def generate_count_report(self):
+        self.start_report(self.load_count_report, "count report")
 
-                old_col = f"{col}_old"
-                new_col = f"{col}_new"
+    def load_count_report(self, job, master_path, changes_path):
+        build = lambda: self.load_diff(job, master_path, changes_path).count_report()
+        return self.cached_report(job, "count", master_path, changes_path, build)[0]
 
-                if old_col in merged.columns and new_col in merged.columns:
-                    diff_count = (merged[old_col] != merged[new_col]).sum()
-                    if diff_count > 0:
-                        changes.append((col, diff_count))
+    def generate_changes_report(self):
+        self.start_report(self.load_changes_report, "changes report")
+
+    def load_changes_report(self, job, master_path, changes_path):
+        """Changes Report of the given files, also recorded in the change history"""
+        build = lambda: self.load_diff(job, master_path, changes_path).changes_report()
+        report, cached = self.cached_report(job, "changes", master_path, changes_path, build)
+        if cached and self.history.recorded_period(changes_path):
+            return report
+        period = file_period(changes_path)
+        if period:
+            job.progress(f"Recording {period} in change history")
+            self.history.record(period, report, master_path, changes_path)
+        return report
+
+    def generate_employee_history(self):
+        position = self.viewer.selected_row()
+        selected = ""
+        if position is not None and report_engine.KEY_COLUMN in self.latest_df.columns:
+            selected = str(self.latest_df[report_engine.KEY_COLUMN].iloc[position])
+        key = simpledialog.askstring("Employee Change History", "UNIT_PERNO:", initialvalue=selected, parent=self.root)
+        if key and key.strip():
+            self.start_report(lambda job, *paths: self.history.employee_history(key.strip()), "employee change history")
 
-            df = pd.DataFrame(changes, columns=["Column", "Count"])
-            self.display_report(df)
+    def generate_new_joinee_report(self):
+        self.start_report(self.load_new_joinee_report, "new joinee report")
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate count report:\n{e}")
+    def load_new_joinee_report(self, job, master_path, changes_path):
+        build = lambda: self.load_new_joinees(job, master_path, changes_path)
+        return self.cached_report(job, "new-joinee", master_path, changes_path, build)[0]
 
-    def generate_changes_report(self):
-        try:
-            master_df = pd.read_csv(self.master_path.get())
-            changes_df = pd.read_csv(self.changes_path.get())
-            merged = pd.merge(master_df, changes_df, on="UNIT_PERNO", suffixes=("_old", "_new"))
-            report = []
-            for col in set(master_df.columns).intersection(changes_df.columns):
-                if col in ("UNIT_PERNO", "YYYYMM"):
-                    continue
-                changed = merged[merged[f"{col}_old"] != merged[f"{col}_new"]]
-                for _, row in changed.iterrows():
-                    report.append([row["UNIT_PERNO"], col, row[f"{col}_old"], row[f"{col}_new"]])
-            df = pd.DataFrame(report, columns=["UNIT_PERNO", "COLUMN", "OLD_VALUE", "NEW_VALUE"])
-            self.display_report(df)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate changes report:\n{e}")
+    def run_batch(self):
+        source = filedialog.askdirectory(title="Folder of master/changes files")
+        if not source:
+            return
+        out_dir = filedialog.askdirectory(title="Folder for batch exports")
+        if not out_dir:
+            return
+        job = self.jobs.submit(
+            "batch", "Running batch", self.process_batch, source, out_dir,
+            on_success=self.show_batch_summary,
+            on_error=lambda e: messagebox.showerror("Batch Error", f"Batch run failed:\n{e}"),
+        )
+        if job is None:
+            messagebox.showinfo("Busy", "A batch is already running.")
+
+    def process_batch(self, job, source, out_dir):
+        pairs = batch_runner.load_pairs(source)
+        job.progress(f"{len(pairs)} pairs found")
+        summary, per_minute = batch_runner.run_batch(pairs, out_dir, progress=job.progress)
+        return summary, per_minute, out_dir
+
+    def show_batch_summary(self, result):
+        summary, per_minute, out_dir = result
+        self.display_report(summary)
+        failed = int((summary["STATUS"] != "ok").sum())
+        text = (f"Processed {len(summary) - failed} of {len(summary)} pairs at {per_minute:.1f} pairs/minute.\n\n"
+                f"Exports and {batch_runner.SUMMARY_FILE}:\n{out_dir}")
+        if failed:
+            messagebox.showwarning("Batch Run", text)
+        else:
+            messagebox.showinfo("Batch Run", text)
 
-    def generate_new_joinee_report(self):
-        try:
-            master_df = pd.read_csv(self.master_path.get())
-            changes_df = pd.read_csv(self.changes_path.get())
-            master_df.columns = master_df.columns.str.strip().str.upper()
-            changes_df.columns = changes_df.columns.str.strip().str.upper()
-            new_joinees = changes_df[~changes_df["UNIT_PERNO"].isin(master_df["UNIT_PERNO"])]
-            selected_cols = ["SAIL_PERNO", "NAME", "DOB", "DOJ_SAIL", "PAN", "BANK_ACNO", "IFSC_CD"]
-            existing_cols = [col for col in selected_cols if col in new_joinees.columns]
-            new_joinees = new_joinees[existing_cols]
-            new_joinees.reset_index(drop=True, inplace=True)
-            self.display_report(new_joinees)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate new joinee report:\n{e}")
+    def cancel_jobs(self):
+        self.jobs.cancel()
+
+    def close(self):
+        self.jobs.shutdown()
+        self.root.destroy()
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -0,0 +1,206 @@
+import os
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import pandas as pd
+
+from report_export import export_report
+
+BatchPair = namedtuple("BatchPair", ["name", "master", "changes"])
+
+SUMMARY_FILE = "batch_summary.csv"
+SUMMARY_COLUMNS = [
+    "NAME", "STATUS", "EMPLOYEES_CHANGED", "CHANGED_FIELDS", "COLUMNS_CHANGED", "NEW_JOINEES",
+    "SECONDS", "MASTER", "CHANGES", "ERROR",
+]
+REPORT_FILES = {
+    "count_report": "Employee_Count_Report",
+    "changes_report": "Employee_Changes_Report",
+    "new_joinee_report": "New_Joinees_Report",
+}
+FILE_ROLES = ("MASTER", "CHANGES")
+PERIOD_PATTERN = re.compile(r"(?<!\d)(20\d{2}(?:0[1-9]|1[0-2]))(?!\d)")
+
+
+def _unit_label(path):
+    """Name of the unit a payroll file belongs to: its file name without role and YYYYMM"""
+    label = re.sub(r"MASTER|CHANGES|(?<!\d)20\d{4}(?!\d)", "", path.stem.upper())
+    label = re.sub(r"[\s_\-.]+", "_", label).strip("_")
+    return label or path.parent.name.upper()
+
+
+def _file_period(path):
+    match = PERIOD_PATTERN.search(path.stem)
+    return match.group(1) if match else None
+
+
+def _pair_periods(label, files):
+    """[(master, changes, changes period)] for one unit holding several months of files
+
+    Each changes file is paired with the latest master of an earlier month,
+    or of the same month when there is none.
+    """
+    periods = {role: [(_file_period(path), path) for path in files[role]] for role in FILE_ROLES}
+    undated = [path for role in FILE_ROLES for period, path in periods[role] if period is None]
+    if undated:
+        raise ValueError(f"Several master or changes files for {label}, and {undated[0]} has no YYYYMM in its name")
+    for role in FILE_ROLES:
+        seen = {}
+        for period, path in periods[role]:
+            if period in seen:
+                raise ValueError(f"More than one {role.lower()} file for {label} {period}: {seen[period]}, {path}")
+            seen[period] = path
+    pairs = []
+    for period, changes in sorted(periods["CHANGES"]):
+        earlier = [(p, path) for p, path in periods["MASTER"] if p < period] or \
+            [(p, path) for p, path in periods["MASTER"] if p == period]
+        if earlier:
+            pairs.append((max(earlier)[1], changes, period))
+    return pairs
+
+
+def find_pairs(directory, skipped=None):
+    """Master/changes pairs under ``directory``, matched on unit name within each folder
+
+    A file is a master or changes file when its name contains MASTER or
+    CHANGES; the rest of the name, minus any YYYYMM, names the unit. So
+    ``DEPT7_MASTER_202401.csv`` pairs with ``DEPT7_CHANGES_202402.csv``, and
+    a folder holding one ``master.csv`` and one ``changes.csv`` is a unit
+    named after the folder. When a unit has files for several months, each
+    changes file is paired with the latest earlier master and the pair name
+    gets the changes file's YYYYMM, e.g. ``DEPT7_202402``.
+
+    A unit whose files cannot be paired unambiguously raises ValueError, or
+    is left out with its message appended to ``skipped`` when a list is given.
+    """
+    found = {}
+    for path in sorted(Path(directory).rglob("*.csv")):
+        roles = [role for role in FILE_ROLES if role in path.name.upper()]
+        if len(roles) != 1:
+            continue
+        unit = (path.parent, _unit_label(path))
+        found.setdefault(unit, {role: [] for role in FILE_ROLES})[roles[0]].append(path)
+
+    pairs, names = [], set()
+    for (folder, label), files in found.items():
+        if not all(files.values()):
+            continue
+        if len(files["MASTER"]) == 1 and len(files["CHANGES"]) == 1:
+            matched = [(files["MASTER"][0], files["CHANGES"][0], None)]
+        else:
+            try:
+                matched = _pair_periods(label, files)
+            except ValueError as e:
+                if skipped is None:
+                    raise
+                skipped.append(str(e))
+                continue
+        for master, changes, period in matched:
+            base = label if period is None else f"{label}_{period}"
+            name = base if base not in names else f"{folder.name.upper()}_{base}"
+            names.add(name)
+            pairs.append(BatchPair(name, str(master), str(changes)))
+    return pairs
+
+
+def read_manifest(path):
+    """Pairs listed in a CSV manifest with MASTER and CHANGES (and optional NAME) columns
+
+    Relative file paths are resolved against the manifest's folder.
+    """
+    manifest = pd.read_csv(path, dtype=str)
+    manifest.columns = manifest.columns.str.strip().str.upper()
+    missing = [col for col in FILE_ROLES if col not in manifest.columns]
+    if missing:
+        raise ValueError(f"Manifest {path} needs columns: {', '.join(missing)}")
+    base = Path(path).resolve().parent
+    pairs = []
+    for i, row in enumerate(manifest.itertuples(index=False), start=1):
+        master, changes = (str(base / getattr(row, col).strip()) for col in FILE_ROLES)
+        name = getattr(row, "NAME", None)
+        pairs.append(BatchPair(name.strip() if isinstance(name, str) and name.strip() else f"PAIR_{i}", master, changes))
+    return pairs
+
+
+def load_pairs(source):
+    """Pairs from a directory, or from a manifest file"""
+    return find_pairs(source) if os.path.isdir(source) else read_manifest(source)
+
+
+def default_workers():
+    return os.cpu_count() or 1
+
+
+def run_pair(pair, out_dir, formats=("csv",), memory_budget=None):
+    """Run all three reports for one pair and export them to ``out_dir/<name>``
+
+    Runs in a worker process; failures are reported in the returned summary
+    row rather than raised.
+    """
+    import streaming_diff
+
+    start = time.perf_counter()
+    summary = {"NAME": pair.name, "MASTER": pair.master, "CHANGES": pair.changes}
+    try:
+        options = {} if memory_budget is None else {"memory_budget": memory_budget}
+        diff = streaming_diff.compare_files(pair.master, pair.changes, **options)
+        target = Path(out_dir, pair.name)
+        target.mkdir(parents=True, exist_ok=True)
+        reports = {method: getattr(diff, method)() for method in REPORT_FILES}
+        for method, df in reports.items():
+            for fmt in formats:
+                # Pairs already run in parallel processes, so each PDF renders in one
+                export_report(df, target / f"{REPORT_FILES[method]}.{fmt}", workers=1)
+        changes = reports["changes_report"]
+        summary.update({
+            "STATUS": "ok",
+            "EMPLOYEES_CHANGED": changes["UNIT_PERNO"].nunique(),
+            "CHANGED_FIELDS": len(changes),
+            "COLUMNS_CHANGED": len(reports["count_report"]),
+            "NEW_JOINEES": len(reports["new_joinee_report"]),
+        })
+    except Exception as e:
+        summary.update({"STATUS": "failed", "ERROR": f"{type(e).__name__}: {e}"})
+    summary["SECONDS"] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def run_batch(pairs, out_dir, workers=None, formats=("csv",), memory_budget=None, progress=None):
+    """Run every pair in a process pool and write the consolidated summary
+
+    Returns (summary frame, pairs per minute). ``progress`` is called as
+    ``progress(message, fraction)`` after each pair finishes.
+    """
+    if not pairs:
+        raise ValueError("No master/changes pairs to process")
+    if len({pair.name for pair in pairs}) != len(pairs):
+        raise ValueError("Batch pair names must be unique")
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    workers = max(1, min(workers or default_workers(), len(pairs)))
+    if memory_budget is None:
+        import streaming_diff
+
+        # Pairs are compared side by side, so the workers share the default budget
+        memory_budget = streaming_diff.default_memory_budget() // workers
+    start = time.perf_counter()
+    rows = []
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(run_pair, pair, out_dir, tuple(formats), memory_budget) for pair in pairs]
+        for done, future in enumerate(as_completed(futures), start=1):
+            row = future.result()
+            rows.append(row)
+            if progress:
+                progress(f"{row['NAME']}: {row['STATUS']} ({done} of {len(pairs)})", done / len(pairs))
+    finally:
+        pool.shutdown(cancel_futures=True)
+    elapsed = time.perf_counter() - start
+
+    order = {pair.name: i for i, pair in enumerate(pairs)}
+    summary = pd.DataFrame(sorted(rows, key=lambda row: order[row["NAME"]])).reindex(columns=SUMMARY_COLUMNS)
+    summary = summary.astype({col: "Int64" for col in SUMMARY_COLUMNS[2:6]})
+    summary.to_csv(Path(out_dir, SUMMARY_FILE), index=False)
+    return summary, len(pairs) * 60 / elapsed if elapsed else float("inf")
@@ -0,0 +1,66 @@
+"""Cold-start time of the headless CLI versus importing the GUI module
+
+Each measurement runs in a fresh interpreter. Run from the repository root:
+
+    python benchmarks/bench_cold_start.py --repeat 5
+"""
+import argparse
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_changes_report import make_pair
+
+GUI_MODULES = ("tkinter", "PIL", "fpdf")
+
+
+def run(code):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    return time.perf_counter() - start, result
+
+
+def measure(label, code, repeat):
+    timings, result = [], None
+    for _ in range(repeat):
+        elapsed, result = run(code)
+        timings.append(elapsed)
+    status = "ok" if result.returncode == 0 else f"failed: {result.stderr.strip().splitlines()[-1]}"
+    print(f"{label:<32} {statistics.median(timings):7.3f}s  {result.stdout.strip()}  [{status}]")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--employees", type=int, default=5000)
+    args = parser.parse_args()
+
+    loaded = f"import sys; print([m for m in {GUI_MODULES!r} if m in sys.modules])"
+    with tempfile.TemporaryDirectory() as tmp:
+        master_df, changes_df = make_pair(args.employees, 20, 0.05)
+        master, changes = Path(tmp, "MASTER.csv"), Path(tmp, "CHANGES.csv")
+        master_df.to_csv(master, index=False)
+        changes_df.to_csv(changes, index=False)
+        # No report cache or snapshots, so every run really starts cold, and
+        # nothing is written outside the temporary directory
+        report = (
+            "import payroll_cli; payroll_cli.main(['report', 'count', '--quiet', '--no-cache', '--no-snapshots', "
+            f"'--timings-log', {str(Path(tmp, 'timings.jsonl'))!r}, "
+            f"'--master', {str(master)!r}, '--changes', {str(changes)!r}]); "
+        )
+
+        measure("python (baseline)", "pass", args.repeat)
+        measure("import payroll_cli", "import payroll_cli; " + loaded, args.repeat)
+        measure("payroll report count", report + loaded, args.repeat)
+        measure("import Payroll (GUI module)", "import Payroll; " + loaded, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
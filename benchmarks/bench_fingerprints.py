@@ -0,0 +1,50 @@
+"""Row fingerprint fast path: full comparison vs skipping unchanged employees
+
+A typical month changes only a few percent of employees. Run from the
+repository root:
+
+    python benchmarks/bench_fingerprints.py --employees 60000 --columns 150 --changed-rows 0.05
+"""
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import report_engine
+from bench_changes_report import make_pair, timed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=60000)
+    parser.add_argument("--columns", type=int, default=150)
+    parser.add_argument("--changed-rows", type=float, default=0.05)
+    args = parser.parse_args()
+
+    master_df, changes_df = make_pair(args.employees, args.columns, 0.1, changed_rows=args.changed_rows)
+    print(f"{args.employees} employees x {args.columns} columns, {args.changed_rows:.0%} of employees changed")
+    columns = report_engine.shared_columns(master_df, changes_df)
+
+    # Fingerprints that differ on every row reproduce the full comparison
+    everything = np.zeros(len(master_df), dtype=np.uint64), np.ones(len(changes_df), dtype=np.uint64)
+    full, full_time = timed(lambda: report_engine.PayrollDiff(master_df, changes_df, *everything).changes_report())
+    print(f"full comparison:       {full_time:8.3f}s  {len(full)} rows")
+
+    hashed, hashed_time = timed(lambda: report_engine.PayrollDiff(master_df, changes_df).changes_report())
+    print(f"fingerprint both:      {hashed_time:8.3f}s  {len(hashed)} rows")
+
+    # Next month's run: the master's fingerprints were saved with its snapshot
+    master_prints = report_engine.row_fingerprints(master_df, columns)
+    stored, stored_time = timed(
+        lambda: report_engine.PayrollDiff(master_df, changes_df, master_fingerprints=master_prints).changes_report()
+    )
+    print(f"stored master prints:  {stored_time:8.3f}s  {len(stored)} rows")
+    print(f"identical output: {full.equals(hashed) and full.equals(stored)}")
+
+
+if __name__ == "__main__":
+    main()
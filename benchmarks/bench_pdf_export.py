@@ -0,0 +1,92 @@
+"""PDF export: legacy bordered-cell loop vs the shared pdf_export renderer
+
+Run from the repository root:
+
+    python benchmarks/bench_pdf_export.py --rows 100000
+"""
+import argparse
+import sys
+import time
+import warnings
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pdf_export
+
+
+def make_changes_report(rows, seed=0):
+    """A Changes Report shaped frame with a mix of short and long values"""
+    rng = np.random.default_rng(seed)
+    columns = np.array(["BANK_ACNO", "IFSC_CD", "BASIC_PAY", "GRADE", "DEPT_CD"], dtype=object)
+    return pd.DataFrame({
+        "UNIT_PERNO": rng.integers(100000, 999999, rows),
+        "COLUMN": rng.choice(columns, rows),
+        "OLD_VALUE": rng.integers(10**9, 10**18, rows).astype(str),
+        "NEW_VALUE": rng.normal(50000, 5000, rows).round(2),
+    })
+
+
+def legacy_render(df):
+    """The original PayrollApp.export_pdf rendering loop"""
+    from fpdf import FPDF
+
+    pdf = FPDF(orientation='L', unit='mm', format='A4')
+    pdf.set_auto_page_break(auto=True, margin=10)
+    pdf.set_font("Helvetica", size=6)
+    columns = list(df.columns)
+    usable_width = 290
+    for i in range(0, len(columns), 10):
+        subset_cols = columns[i:i+10]
+        subset_df = df[subset_cols]
+        pdf.add_page()
+        cell_width = max(25, usable_width / len(subset_cols))
+        for col in subset_cols:
+            pdf.cell(cell_width, 6, str(col)[:15], border=1)
+        pdf.ln()
+        for _, row in subset_df.iterrows():
+            for item in row:
+                text = str(item)
+                text = text[:15] + "..." if len(text) > 18 else text
+                pdf.cell(cell_width, 6, text, border=1)
+            pdf.ln()
+    return bytes(pdf.output())
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--workers", type=int, default=pdf_export.default_workers())
+    parser.add_argument("--skip-legacy", action="store_true")
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)
+    import fpdf  # noqa: F401  keep the one-off import cost out of the timings
+
+    df = make_changes_report(args.rows)
+    print(f"{args.rows} rows x {len(df.columns)} columns")
+
+    data, fast_time = timed(pdf_export.render_pdf, df)
+    print(f"renderer:          {fast_time:8.2f}s  {len(data) / 1e6:.1f} MB")
+
+    wide = pd.concat([df.add_suffix(f"_{i}") for i in range(4)], axis=1)
+    data, wide_time = timed(pdf_export.render_pdf, wide, workers=args.workers)
+    print(f"renderer, {len(wide.columns)} cols, {args.workers} workers: {wide_time:8.2f}s  {len(data) / 1e6:.1f} MB")
+
+    if args.skip_legacy:
+        return
+    data, slow_time = timed(legacy_render, df)
+    print(f"legacy:            {slow_time:8.2f}s  {len(data) / 1e6:.1f} MB")
+    print(f"speedup:           {slow_time / fast_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Master file load time and memory: pd.read_csv vs columnar snapshots
+
+Each variant runs in a fresh interpreter so peak RSS is comparable. Run from
+the repository root:
+
+    python benchmarks/bench_snapshot_load.py --employees 60000 --columns 150
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_changes_report import make_pair
+
+CHILD = """
+import json, sys, time
+sys.path.insert(0, {root!r})
+import pandas as pd
+from snapshot_store import SnapshotStore
+def peak_rss_mb():
+    # VmHWM is per address space; ru_maxrss would include the parent's pre-exec size
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return float("nan")
+store = SnapshotStore({snapshots!r}, fmt={fmt!r})
+before = peak_rss_mb()
+start = time.perf_counter()
+{load}
+elapsed = time.perf_counter() - start
+frame_mb = df.memory_usage(deep=True).sum() / 2**20
+print(json.dumps({{"seconds": elapsed, "frame_mb": frame_mb, "load_rss_mb": peak_rss_mb() - before}}))
+"""
+
+VARIANTS = [
+    ("read_csv, all columns", "csv", "df = pd.read_csv({path!r})"),
+    ("read_csv, UNIT_PERNO only", "csv", "df = pd.read_csv({path!r}, usecols=['UNIT_PERNO'])"),
+    ("parquet snapshot, all columns", "parquet", "df = store.read({path!r})"),
+    ("parquet snapshot, UNIT_PERNO", "parquet", "df = store.read({path!r}, ['UNIT_PERNO'])"),
+    ("npy snapshot, all columns", "npy", "df = store.read({path!r})"),
+    ("npy snapshot, UNIT_PERNO", "npy", "df = store.read({path!r}, ['UNIT_PERNO'])"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=60000)
+    parser.add_argument("--columns", type=int, default=150)
+    args = parser.parse_args()
+
+    from snapshot_store import SnapshotStore, _has_pyarrow
+
+    with tempfile.TemporaryDirectory() as tmp:
+        master_df, _ = make_pair(args.employees, args.columns, 0.0)
+        path = str(Path(tmp, "MASTER_202401.csv"))
+        master_df.to_csv(path, index=False)
+        print(f"{args.employees} employees x {args.columns} columns, "
+              f"{Path(path).stat().st_size / 2**20:.1f} MB CSV")
+
+        formats = ["npy"] + (["parquet"] if _has_pyarrow() else [])
+        for fmt in formats:
+            SnapshotStore(Path(tmp, fmt), fmt=fmt).convert(path)
+
+        for label, fmt, load in VARIANTS:
+            if fmt not in formats + ["csv"]:
+                print(f"{label:<32} skipped (pyarrow not installed)")
+                continue
+            code = CHILD.format(
+                root=str(ROOT), snapshots=str(Path(tmp, fmt if fmt != "csv" else "npy")),
+                fmt=fmt if fmt != "csv" else "npy", load=load.format(path=path),
+            )
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            stats = json.loads(result.stdout)
+            print(f"{label:<32} {stats['seconds']:7.3f}s  frame {stats['frame_mb']:7.1f} MB"
+                  f"  peak RSS growth {stats['load_rss_mb']:7.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Benchmark suite: reports, exports and email assembly at 10k, 100k and 1M employees
+
+Each size is generated with payroll_data.py, written to CSV and run through
+the same code the GUI uses. Results are appended to
+benchmarks/results/suite.jsonl and every stage is compared with the previous
+run of the same size on this machine, so regressions stand out. Run from the
+repository root:
+
+    python benchmarks/bench_suite.py --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import pandas as pd
+
+import mailer
+import pdf_export
+import report_engine
+import report_export
+from dataset_cache import read_payroll_csv
+from instrumentation import Run, stage
+from payroll_data import write_pair
+from search_index import SearchIndex
+
+RESULTS_FILE = Path(__file__).resolve().parent / "results" / "suite.jsonl"
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+
+def _commit():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() or None
+
+
+def _viewer():
+    """A hidden Tk viewer to time display_report with, or None without a display"""
+    try:
+        import tkinter as tk
+        from tkinter import ttk
+
+        from report_viewer import VirtualTreeview
+
+        root = tk.Tk()
+    except Exception:
+        return None
+    root.withdraw()
+    tree = ttk.Treeview(root, show="headings")
+    return root, VirtualTreeview(tree, ttk.Scrollbar(root, orient="vertical"))
+
+
+def run_pair(master_path, changes_path, workdir, skip_pdf, viewer):
+    """Time every stage for one pair of CSVs; returns the instrumentation Run"""
+    run = Run(f"{master_path} vs {changes_path}", log_path=None)
+    with run.active():
+        with stage("read csv") as timed:
+            master_df, changes_df = read_payroll_csv(master_path), read_payroll_csv(changes_path)
+            timed.rows = len(master_df) + len(changes_df)
+        with stage("compare") as timed:
+            diff = report_engine.PayrollDiff(master_df, changes_df)
+            timed.rows = len(diff.rows)
+        reports = {}
+        for name in ("count_report", "changes_report", "new_joinee_report"):
+            with stage(name.replace("_", " ")) as timed:
+                reports[name] = getattr(diff, name)()
+                timed.rows = len(reports[name])
+
+        report = reports["changes_report"]
+        if viewer is not None:
+            with stage("display", rows=len(report)):
+                viewer[1].set_dataframe(report)
+                viewer[0].update_idletasks()
+        with stage("search index", rows=len(report)):
+            SearchIndex(report)
+        with stage("csv export", rows=len(report)):
+            report_export.write_csv(report, Path(workdir, "export.csv"))
+        if not skip_pdf:
+            with stage("pdf export", rows=len(report)):
+                pdf_export.write_pdf(report, Path(workdir, "export.pdf"), workers=pdf_export.default_workers())
+        with stage("email assembly", rows=len(report)):
+            base_name, subject = mailer.report_names("Generate Changes Report")
+            attachments = mailer.build_attachments(report, "CSV only", base_name)
+            mailer.build_message("sender@example.com", "recipient@example.com", subject, attachments).as_bytes()
+    run.finish()
+    return run
+
+
+def previous_results(path, host, columns):
+    """Latest earlier result per (employees, stage) from this machine"""
+    latest = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                record = json.loads(line)
+                if record["host"] == host and record["columns"] == columns:
+                    latest[(record["employees"], record["stage"])] = record
+    except (OSError, ValueError):
+        pass
+    return latest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="employee counts to run")
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--skip-pdf", action="store_true", help="leave out PDF export (slowest stage at 1M)")
+    parser.add_argument("--repeat", type=int, default=3, help="timing runs per size; the fastest is kept")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative slowdown flagged as a regression")
+    parser.add_argument("--min-delta", type=float, default=0.05,
+                        help="seconds a stage must slow down by before it can be flagged")
+    parser.add_argument("--results", type=Path, default=RESULTS_FILE)
+    args = parser.parse_args()
+
+    host = platform.node()
+    baseline = previous_results(args.results, host, args.columns)
+    common = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"), "commit": _commit(), "host": host,
+        "python": platform.python_version(), "pandas": pd.__version__, "columns": args.columns,
+    }
+    viewer = _viewer()
+    if viewer is None:
+        print("No display available; the display stage is skipped")
+
+    records, regressions = [], []
+    for employees in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = write_pair(tmp, employees=employees, columns=args.columns)
+            runs = [run_pair(*paths, tmp, args.skip_pdf, viewer) for _ in range(max(1, args.repeat))]
+        fastest = {}
+        for run in runs:
+            for record in run.stages:
+                if "." not in record.name and (record.name not in fastest or record.seconds < fastest[record.name].seconds):
+                    fastest[record.name] = record
+        print(f"\n{employees:,} employees x {args.columns} columns, best of {len(runs)}")
+        for record in fastest.values():
+            previous = baseline.get((employees, record.name))
+            change = ""
+            if previous and previous["seconds"] > 0:
+                ratio = record.seconds / previous["seconds"] - 1
+                change = f"{ratio:+7.1%} vs {previous['commit'] or previous['timestamp']}"
+                if ratio > args.tolerance and record.seconds - previous["seconds"] > args.min_delta:
+                    change += "  REGRESSION"
+                    regressions.append(f"{employees} {record.name}")
+            rows = "" if record.rows is None else f"{record.rows:>10,} rows"
+            print(f"  {record.name:<18} {record.seconds:9.3f}s {rows:>16}  {change}")
+            records.append({**common, "employees": employees, "stage": record.name,
+                            "seconds": round(record.seconds, 4), "rows": record.rows,
+                            "peak_rss_mb": record.peak_rss_mb and round(record.peak_rss_mb, 1)})
+
+    args.results.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.results, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    print(f"\nResults appended to {args.results}")
+    if regressions:
+        print("Regressions: " + ", ".join(regressions))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Synthetic master/changes payroll CSV pairs for benchmarks and trials
+
+Run from the repository root:
+
+    python benchmarks/payroll_data.py --employees 100000 --columns 60 --out-dir sample_data
+
+Writes MASTER_<YYYYMM>.csv and CHANGES_<next YYYYMM>.csv. The files carry
+the identity columns the reports use (UNIT_PERNO, SAIL_PERNO, NAME, DOB,
+DOJ_SAIL, PAN, BANK_ACNO, IFSC_CD), department/grade codes and pay elements
+with paise, padded with further pay and code columns up to ``--columns``.
+"""
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FIRST_NAMES = np.array([
+    "AMIT", "ANITA", "ARUN", "DEEPAK", "GEETA", "KIRAN", "MANOJ", "NEHA", "PANKAJ", "PRIYA",
+    "RAHUL", "RAJESH", "RANJIT", "REKHA", "SANJAY", "SUNITA", "SURESH", "UMESH", "VIKAS", "VINOD",
+])
+LAST_NAMES = np.array([
+    "KUMAR", "SINGH", "PRASAD", "MAHTO", "SHARMA", "GUPTA", "ORAON", "MUNDA", "DAS", "SINHA",
+    "MISHRA", "PANDEY", "RAVIDAS", "TIWARI", "VERMA",
+])
+CODE_POOLS = {
+    "DEPT_CD": np.array([f"D{i:03d}" for i in range(1, 121)]),
+    "GRADE": np.array(["S1", "S2", "S3", "S4", "S5", "S6", "S7", "S8", "S9", "S10", "E0", "E1", "E2", "E3", "E4"]),
+    "DESG_CD": np.array([f"DG{i:02d}" for i in range(1, 61)]),
+    "CADRE": np.array(["NE", "EX", "JO"]),
+    "STATUS": np.array(["A", "A", "A", "A", "A", "L", "S"]),
+}
+IFSC_CODES = np.array([f"SBIN00{i:05d}" for i in range(200)] + [f"PUNB0{i:06d}" for i in range(100)])
+PAY_COLUMNS = {"BASIC_PAY": (18000, 160000), "DA": (2000, 60000), "HRA": (0, 30000), "PERKS": (0, 40000)}
+BASE_COLUMNS = 8 + len(CODE_POOLS) + len(PAY_COLUMNS) + 1
+# Identity columns a month-to-month update never touches
+FIXED_COLUMNS = {"UNIT_PERNO", "YYYYMM", "SAIL_PERNO", "DOB", "DOJ_SAIL", "PAN"}
+
+
+def _pan_numbers(rng, n):
+    """PAN-shaped strings: five letters, four digits, one letter"""
+    chars = rng.integers(65, 91, size=(n, 10), dtype=np.uint8)
+    chars[:, 5:9] = rng.integers(48, 58, size=(n, 4), dtype=np.uint8)
+    return chars.view("S10").ravel().astype(str).astype(object)
+
+
+def _dates(rng, n, start, span_days):
+    return (np.datetime64(start) + rng.integers(0, span_days, n)).astype(str).astype(object)
+
+
+def employee_rows(rng, keys, columns, period):
+    """Frame of freshly generated employees with the given UNIT_PERNO values"""
+    n = len(keys)
+    data = {
+        "UNIT_PERNO": keys.astype(str).astype(object),
+        "YYYYMM": np.full(n, period),
+        "SAIL_PERNO": np.char.add("S", keys.astype(str)).astype(object),
+        "NAME": np.char.add(np.char.add(rng.choice(FIRST_NAMES, n), " "), rng.choice(LAST_NAMES, n)).astype(object),
+        "DOB": _dates(rng, n, "1965-01-01", 365 * 38),
+        "DOJ_SAIL": _dates(rng, n, "1985-01-01", 365 * 39),
+        "PAN": _pan_numbers(rng, n),
+        "BANK_ACNO": rng.integers(10**10, 10**14, n).astype(str).astype(object),
+        "IFSC_CD": rng.choice(IFSC_CODES, n).astype(object),
+    }
+    for col, pool in CODE_POOLS.items():
+        data[col] = rng.choice(pool, n).astype(object)
+    for col, (low, high) in PAY_COLUMNS.items():
+        data[col] = np.round(rng.uniform(low, high, n), 2)
+    data["HRA"][rng.random(n) < 0.02] = np.nan
+    data["NET_PAY"] = np.round(sum(data[col] for col in ("BASIC_PAY", "DA", "PERKS")), 2)
+    for i in range(max(0, columns - BASE_COLUMNS)):
+        if i % 4 == 3:
+            data[f"ALLOW_CD_{i}"] = rng.choice(np.array(["A", "B", "C", "N"]), n).astype(object)
+        else:
+            data[f"PAY_ELEMENT_{i}"] = np.round(rng.uniform(0, 5000, n), 2)
+    return pd.DataFrame(data)
+
+
+def _next_period(period):
+    year, month = divmod(period, 100)
+    return year * 100 + month + 1 if month < 12 else (year + 1) * 100 + 1
+
+
+def generate_pair(employees=10000, columns=40, churn=0.05, new_joinee_rate=0.01, leaver_rate=0.005,
+                  duplicates=0, seed=0, period=202401):
+    """(master_df, changes_df) for one month-to-month update
+
+    ``churn`` of the continuing employees get one to three fields changed,
+    ``new_joinee_rate`` x ``employees`` new keys are appended to the changes
+    file and ``leaver_rate`` of the master is missing from it. ``duplicates``
+    changes-file rows are repeated with a different name, as a bad extract
+    would have them.
+    """
+    rng = np.random.default_rng(seed)
+    keys = np.arange(100000, 100000 + employees)
+    master_df = employee_rows(rng, keys, columns, period)
+
+    stays = rng.random(employees) >= leaver_rate
+    changes_df = master_df[stays].reset_index(drop=True)
+    changes_df["YYYYMM"] = _next_period(period)
+
+    changeable = [col for col in changes_df.columns if col not in FIXED_COLUMNS]
+    changed = np.flatnonzero(rng.random(len(changes_df)) < churn)
+    fields = rng.integers(1, 4, len(changed))
+    rows = np.repeat(changed, fields)
+    targets = rng.integers(0, len(changeable), len(rows))
+    for col_index in np.unique(targets):
+        col = changeable[col_index]
+        picked = np.unique(rows[targets == col_index])
+        values = changes_df[col].to_numpy().copy()
+        if col in CODE_POOLS:
+            values[picked] = rng.choice(CODE_POOLS[col], len(picked))
+        elif col == "IFSC_CD":
+            values[picked] = rng.choice(IFSC_CODES, len(picked))
+        elif col == "BANK_ACNO":
+            values[picked] = rng.integers(10**10, 10**14, len(picked)).astype(str)
+        elif col == "NAME":
+            first_names = np.array([name.split(" ", 1)[0] for name in values[picked]])
+            values[picked] = np.char.add(np.char.add(first_names, " "), rng.choice(LAST_NAMES, len(picked)))
+        elif col.startswith("ALLOW_CD_"):
+            values[picked] = rng.choice(np.array(["A", "B", "C", "N"]), len(picked))
+        else:
+            values[picked] = np.round(np.nan_to_num(values[picked]) * rng.uniform(1.01, 1.15, len(picked)), 2)
+        changes_df[col] = values
+
+    joinees = int(round(employees * new_joinee_rate))
+    if joinees:
+        new_keys = np.arange(100000 + employees, 100000 + employees + joinees)
+        changes_df = pd.concat(
+            [changes_df, employee_rows(rng, new_keys, columns, _next_period(period))], ignore_index=True
+        )
+    if duplicates:
+        repeated = changes_df.iloc[rng.choice(len(changes_df), duplicates, replace=False)].copy()
+        repeated["NAME"] = repeated["NAME"] + " DUPLICATE"
+        changes_df = pd.concat([changes_df, repeated], ignore_index=True)
+    return master_df, changes_df
+
+
+def write_pair(out_dir, **options):
+    """Generate a pair and write it as MASTER_/CHANGES_ CSVs; returns both paths"""
+    master_df, changes_df = generate_pair(**options)
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    period = options.get("period", 202401)
+    master_path = out_dir / f"MASTER_{period}.csv"
+    changes_path = out_dir / f"CHANGES_{_next_period(period)}.csv"
+    master_df.to_csv(master_path, index=False)
+    changes_df.to_csv(changes_path, index=False)
+    return master_path, changes_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--employees", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=40)
+    parser.add_argument("--churn", type=float, default=0.05, help="fraction of employees with changed fields")
+    parser.add_argument("--new-joinees", type=float, default=0.01, help="new joinees as a fraction of employees")
+    parser.add_argument("--leavers", type=float, default=0.005, help="fraction of employees missing from changes")
+    parser.add_argument("--duplicates", type=int, default=0, help="duplicated UNIT_PERNO rows in the changes file")
+    parser.add_argument("--period", type=int, default=202401, help="YYYYMM of the master file")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", default="sample_data")
+    args = parser.parse_args()
+
+    paths = write_pair(
+        args.out_dir, employees=args.employees, columns=args.columns, churn=args.churn,
+        new_joinee_rate=args.new_joinees, leaver_rate=args.leavers, duplicates=args.duplicates,
+        seed=args.seed, period=args.period,
+    )
+    for path in paths:
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
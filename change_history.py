@@ -0,0 +1,180 @@
+import os
+import sqlite3
+from contextlib import closing
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from dataset_cache import content_hash, normalize_columns
+from report_engine import KEY_COLUMN
+from snapshot_store import PERIOD_COLUMN, detect_period
+
+DEFAULT_HISTORY_DB = Path.home() / "bsp_payroll_history.sqlite3"
+DEFAULT_REPEAT_THRESHOLD = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    id INTEGER PRIMARY KEY,
+    yyyymm TEXT NOT NULL,
+    changes_hash TEXT NOT NULL,
+    changes_file TEXT,
+    master_file TEXT,
+    changes INTEGER NOT NULL,
+    recorded_at TEXT NOT NULL,
+    UNIQUE (yyyymm, changes_hash)
+);
+CREATE TABLE IF NOT EXISTS changes (
+    yyyymm TEXT NOT NULL,
+    unit_perno TEXT NOT NULL,
+    column_name TEXT NOT NULL,
+    source_id INTEGER NOT NULL REFERENCES sources (id),
+    old_value TEXT,
+    new_value TEXT,
+    PRIMARY KEY (yyyymm, unit_perno, column_name, source_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS changes_by_employee ON changes (unit_perno, yyyymm);
+CREATE INDEX IF NOT EXISTS changes_by_column ON changes (column_name, yyyymm);
+CREATE INDEX IF NOT EXISTS changes_by_source ON changes (source_id);
+"""
+
+
+def file_period(path):
+    """YYYYMM of a payroll CSV from its YYYYMM column (read alone) or its file name"""
+    df = pd.read_csv(path, usecols=lambda col: col.strip().upper() == PERIOD_COLUMN)
+    return detect_period(normalize_columns(df), str(path))
+
+
+def _text(values):
+    """Report values as stored TEXT, missing values as NULL"""
+    series = pd.Series(values, dtype=object)
+    return series.where(series.notna(), None).map(lambda value: value if value is None else str(value))
+
+
+def _period_filter(start=None, end=None):
+    clauses, params = [], []
+    if start:
+        clauses.append("yyyymm >= ?")
+        params.append(str(start))
+    if end:
+        clauses.append("yyyymm <= ?")
+        params.append(str(end))
+    return clauses, params
+
+
+class ChangeHistory:
+    """Changes Report rows of every compared month in a local SQLite database
+
+    Each month holds one source per changes file recorded for it, so the
+    reports of every unit compared that month are kept side by side. A
+    source is identified by the contents of its changes file, not its path:
+    recording the same file again, from anywhere, replaces only the rows
+    that came from it, so re-running a pair is idempotent. ``file_hash``
+    computes that identity and can be a memoized hasher such as a
+    ReportCache's ``file_hash``. Each call opens its own connection, so the
+    store can be used from worker threads.
+    """
+
+    def __init__(self, path=DEFAULT_HISTORY_DB, file_hash=content_hash):
+        self.path = Path(path)
+        self.file_hash = file_hash
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        return sqlite3.connect(self.path)
+
+    def _source_hash(self, changes_path):
+        return self.file_hash(changes_path) if changes_path else ""
+
+    def record(self, period, report, master_path=None, changes_path=None):
+        """Store a Changes Report of ``changes_path`` under ``period``; returns the number of rows
+
+        Rows recorded earlier from the same changes file and month are
+        replaced; other files' rows for the month are left alone.
+        """
+        period, source_hash = str(period), self._source_hash(changes_path)
+        with closing(self._connect()) as conn, conn:
+            found = conn.execute(
+                "SELECT id FROM sources WHERE yyyymm = ? AND changes_hash = ?", (period, source_hash)
+            ).fetchone()
+            if found is None:
+                source_id = conn.execute(
+                    "INSERT INTO sources (yyyymm, changes_hash, changes, recorded_at) VALUES (?, ?, 0, '')",
+                    (period, source_hash),
+                ).lastrowid
+            else:
+                source_id = found[0]
+                conn.execute("DELETE FROM changes WHERE source_id = ?", (source_id,))
+            rows = zip(
+                [period] * len(report),
+                report[KEY_COLUMN].astype(str),
+                report["COLUMN"].astype(str),
+                [source_id] * len(report),
+                _text(report["OLD_VALUE"].to_numpy()),
+                _text(report["NEW_VALUE"].to_numpy()),
+            )
+            conn.executemany("INSERT INTO changes VALUES (?, ?, ?, ?, ?, ?)", rows)
+            conn.execute(
+                "UPDATE sources SET changes_file = ?, master_file = ?, changes = ?, recorded_at = ? WHERE id = ?",
+                (changes_path and os.path.abspath(changes_path), master_path and os.path.abspath(master_path),
+                 len(report), datetime.now().isoformat(timespec="seconds"), source_id),
+            )
+        return len(report)
+
+    def recorded_period(self, changes_path):
+        """Month the contents of ``changes_path`` were last recorded under, or None"""
+        with closing(self._connect()) as conn:
+            found = conn.execute(
+                "SELECT yyyymm FROM sources WHERE changes_hash = ? ORDER BY recorded_at DESC LIMIT 1",
+                (self._source_hash(changes_path),),
+            ).fetchone()
+        return found[0] if found else None
+
+    def _query(self, sql, params=()):
+        with closing(self._connect()) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    def months(self):
+        """Recorded months, one row per changes file, with their change counts"""
+        return self._query(
+            "SELECT yyyymm AS YYYYMM, changes AS CHANGES, master_file AS MASTER_FILE, "
+            "changes_file AS CHANGES_FILE, recorded_at AS RECORDED_AT FROM sources ORDER BY yyyymm, changes_file"
+        )
+
+    def employee_history(self, unit_perno, start=None, end=None):
+        """Every recorded change of one employee, oldest month first"""
+        clauses, params = _period_filter(start, end)
+        where = " AND ".join(["unit_perno = ?"] + clauses)
+        return self._query(
+            "SELECT DISTINCT yyyymm AS YYYYMM, column_name AS COLUMN, old_value AS OLD_VALUE, "
+            f"new_value AS NEW_VALUE FROM changes WHERE {where} ORDER BY yyyymm, column_name",
+            [str(unit_perno)] + params,
+        )
+
+    def column_trend(self, column=None, start=None, end=None):
+        """Number of employees changed per column and month"""
+        clauses, params = _period_filter(start, end)
+        if column:
+            clauses.insert(0, "column_name = ?")
+            params.insert(0, column.strip().upper())
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        return self._query(
+            "SELECT yyyymm AS YYYYMM, column_name AS COLUMN, COUNT(DISTINCT unit_perno) AS COUNT "
+            f"FROM changes {where}GROUP BY column_name, yyyymm ORDER BY column_name, yyyymm",
+            params,
+        )
+
+    def repeat_changes(self, threshold=DEFAULT_REPEAT_THRESHOLD, start=None, end=None):
+        """Employee/column pairs that changed in at least ``threshold`` months"""
+        clauses, params = _period_filter(start, end)
+        where = f"WHERE {' AND '.join(clauses)} " if clauses else ""
+        return self._query(
+            "SELECT unit_perno AS UNIT_PERNO, column_name AS COLUMN, COUNT(DISTINCT yyyymm) AS CHANGES, "
+            "REPLACE(GROUP_CONCAT(DISTINCT yyyymm), ',', ', ') AS MONTHS "
+            f"FROM (SELECT * FROM changes {where}ORDER BY yyyymm) "
+            "GROUP BY unit_perno, column_name HAVING COUNT(DISTINCT yyyymm) >= ? "
+            "ORDER BY CHANGES DESC, unit_perno, column_name",
+            params + [int(threshold)],
+        )
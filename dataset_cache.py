@@ -0,0 +1,89 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+import payroll_schema
+
+DEFAULT_MEMORY_LIMIT = 1024 * 1024 * 1024
+HASH_BLOCK = 1024 * 1024
+
+
+def normalize_columns(df):
+    """Strip and upper-case column names in place"""
+    df.columns = df.columns.str.strip().str.upper()
+    return df
+
+
+def file_signature(path):
+    """(resolved path, size, mtime) identifying one version of a file on disk"""
+    resolved = os.path.abspath(path)
+    stat = os.stat(resolved)
+    return resolved, stat.st_size, stat.st_mtime_ns
+
+
+def content_hash(path):
+    """BLAKE2b digest of a file's bytes"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_payroll_csv(path):
+    """Parse a payroll CSV with schema dtypes and normalized column names"""
+    return normalize_columns(payroll_schema.read_csv(path))
+
+
+class DatasetCache:
+    """LRU cache of parsed payroll CSVs keyed on path, size and mtime
+
+    Frames handed out are shared between callers and must be treated as
+    read-only. A file that changes on disk gets a new signature, so the stale
+    entry is dropped on the next lookup.
+    """
+
+    def __init__(self, memory_limit=DEFAULT_MEMORY_LIMIT, reader=read_payroll_csv):
+        self.memory_limit = memory_limit
+        self.reader = reader
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path):
+        """Return the parsed frame for ``path``, reading it only on a miss"""
+        signature = file_signature(path)
+        resolved = signature[0]
+        with self._lock:
+            entry = self._entries.get(resolved)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(resolved)
+                return entry[1]
+            self._entries.pop(resolved, None)
+
+        df = self.reader(resolved)
+        size = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            self._entries[resolved] = (signature, df, size)
+            self._evict()
+        return df
+
+    def invalidate(self, path=None):
+        """Drop one file, or everything when ``path`` is None"""
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    @property
+    def memory_usage(self):
+        with self._lock:
+            return sum(entry[2] for entry in self._entries.values())
+
+    def _evict(self):
+        total = sum(entry[2] for entry in self._entries.values())
+        # Always keep the entry just added, even if it alone is over the cap
+        while total > self.memory_limit and len(self._entries) > 1:
+            _, (_, _, size) = self._entries.popitem(last=False)
+            total -= size
@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from batch_runner import REPORT_FILES, find_pairs
+from dataset_cache import file_signature
+from instrumentation import Run
+from report_export import export_report
+
+LEDGER_FILE = ".payroll_ledger.json"
+DEFAULT_INTERVAL = 30
+DEFAULT_SETTLE = 60
+DEFAULT_RETRIES = 5
+# Seconds before the first retry of a failed pair; doubled after each further failure
+DEFAULT_RETRY_BACKOFF = 300
+
+
+class Ledger:
+    """JSON record of processed master/changes pairs, keyed on both files' signatures
+
+    A pair that succeeded is processed again only when either file is
+    replaced or changes on disk. A failed pair is retried after a backoff
+    until it has failed ``retries`` more times; its entry keeps the archive
+    folder once outputs were written and the emails already delivered, so a
+    retry picks up where the failure left off.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(pair):
+        return json.dumps([file_signature(pair.master), file_signature(pair.changes)])
+
+    def __contains__(self, pair):
+        return self.key(pair) in self.entries
+
+    def get(self, pair):
+        """The recorded entry of ``pair``, or an empty dict"""
+        return self.entries.get(self.key(pair), {})
+
+    def due(self, pair, now, retries=DEFAULT_RETRIES, backoff=DEFAULT_RETRY_BACKOFF):
+        """Whether ``pair`` is new, or failed and ready for another attempt"""
+        entry = self.entries.get(self.key(pair))
+        if entry is None:
+            return True
+        if entry["status"] != "failed":
+            return False
+        attempts = entry.get("attempts", 1)
+        return attempts <= retries and now >= entry.get("failed_at", 0) + backoff * 2 ** (attempts - 1)
+
+    def add(self, pair, **record):
+        with self._lock:
+            key = self.key(pair)
+            if record.get("status") == "failed":
+                record["attempts"] = self.entries.get(key, {}).get("attempts", 0) + 1
+                record["failed_at"] = time.time()
+            self.entries[key] = {"name": pair.name, "master": pair.master, "changes": pair.changes, **record}
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_name(f"{self.path.name}.tmp")
+            with open(tmp, "w") as f:
+                json.dump(self.entries, f, indent=1)
+            os.replace(tmp, self.path)
+
+
+class FolderWatcher:
+    """Poll a drop folder and run reports for every new, fully written master/changes pair
+
+    Files are paired as in ``batch_runner.find_pairs``, so earlier months
+    left in the folder pair up by YYYYMM; units that cannot be paired are
+    reported once and skipped. A file counts as fully written once it has
+    not been modified for ``settle`` seconds and its size and mtime did not
+    move since the previous poll. Outputs of each pair are archived under
+    ``archive_dir/<name>_<timestamp>/`` and, when a ``mail`` callable is
+    given, passed to it as ``mail(reports, delivered)``: a report type ->
+    frame dict, and the set of (report type, recipient) pairs already sent,
+    which it skips and adds to as it sends. When mailing fails the archive
+    is kept, and a retry re-sends only what was not delivered.
+    """
+
+    def __init__(self, drop_dir, archive_dir, reports, formats=("csv",), mail=None, ledger_path=None,
+                 interval=DEFAULT_INTERVAL, settle=DEFAULT_SETTLE, memory_budget=None, progress=None,
+                 retries=DEFAULT_RETRIES, retry_backoff=DEFAULT_RETRY_BACKOFF):
+        self.drop_dir = Path(drop_dir)
+        self.archive_dir = Path(archive_dir)
+        self.reports = reports
+        self.formats = formats
+        self.mail = mail
+        self.ledger = Ledger(ledger_path or self.archive_dir / LEDGER_FILE)
+        self.interval = interval
+        self.settle = settle
+        self.memory_budget = memory_budget
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.progress = progress or (lambda message, fraction=None: None)
+        self._observed = {}
+        self._reported = set()
+        self._stop = threading.Event()
+
+    def _settled(self, path, now):
+        """Whether ``path`` looks fully written, remembering what this poll saw"""
+        try:
+            signature = file_signature(path)
+        except OSError:
+            return False
+        previous = self._observed.get(signature[0])
+        self._observed[signature[0]] = signature
+        unchanged = previous is None or previous == signature
+        return unchanged and now - signature[2] / 1e9 >= self.settle
+
+    def ready_pairs(self):
+        """Pairs in the drop folder that are fully written and new or due for a retry"""
+        now = time.time()
+        skipped = []
+        pairs = find_pairs(self.drop_dir, skipped)
+        for message in skipped:
+            if message not in self._reported:
+                self._reported.add(message)
+                self.progress(f"Skipped: {message}")
+        ready = []
+        for pair in pairs:
+            settled = [self._settled(path, now) for path in (pair.master, pair.changes)]
+            if all(settled) and self.ledger.due(pair, now, self.retries, self.retry_backoff):
+                ready.append(pair)
+        return ready
+
+    def process(self, pair):
+        """Run the configured reports for one pair, archive and mail them, and record the pair"""
+        run = Run(f"Watch {pair.name}")
+        with run.active():
+            ok = self._process(pair)
+        self.progress(run.finish("ok" if ok else "failed"))
+        return ok
+
+    def _process(self, pair):
+        import streaming_diff
+
+        started = datetime.now()
+        previous = self.ledger.get(pair)
+        # After a failure while mailing, reuse the archived outputs and skip delivered emails
+        archived = bool(previous.get("archive")) and Path(previous["archive"]).is_dir()
+        if archived:
+            target, outputs = Path(previous["archive"]), list(previous.get("outputs", []))
+        else:
+            target, outputs = self.archive_dir / f"{pair.name}_{started:%Y%m%d_%H%M%S}", []
+        delivered = {tuple(sent) for sent in previous.get("delivered", [])}
+        try:
+            options = {} if self.memory_budget is None else {"memory_budget": self.memory_budget}
+            diff = streaming_diff.compare_files(pair.master, pair.changes, **options)
+            target.mkdir(parents=True, exist_ok=True)
+            reports = {}
+            for method, report_type in self.reports:
+                df = getattr(diff, method)()
+                reports[report_type] = df
+                if archived:
+                    continue
+                for fmt in self.formats:
+                    path = target / f"{REPORT_FILES[method]}.{fmt}"
+                    export_report(df, path)
+                    outputs.append(str(path))
+            archived = True
+            if self.mail is not None:
+                self.mail(reports, delivered)
+        except Exception as e:
+            self.progress(f"{pair.name}: failed: {e}")
+            self.ledger.add(pair, status="failed", error=f"{type(e).__name__}: {e}",
+                            processed_at=started.isoformat(timespec="seconds"), outputs=outputs,
+                            archive=str(target) if archived else None, delivered=sorted(delivered))
+            return False
+        self.progress(f"{pair.name}: {len(outputs)} outputs archived in {target}")
+        self.ledger.add(pair, status="ok", error="", processed_at=started.isoformat(timespec="seconds"),
+                        outputs=outputs)
+        return True
+
+    def poll(self):
+        """Process every ready pair once; returns the number of pairs processed"""
+        ready = self.ready_pairs()
+        for pair in ready:
+            self.progress(f"{pair.name}: processing {pair.master} and {pair.changes}")
+            self.process(pair)
+        return len(ready)
+
+    def run(self):
+        """Poll until ``stop`` is called"""
+        self.progress(f"Watching {self.drop_dir} every {self.interval}s")
+        while not self._stop.is_set():
+            try:
+                self.poll()
+            except (OSError, ValueError) as e:
+                self.progress(f"Poll failed: {e}")
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,268 @@
+import contextvars
+import cProfile
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_TIMINGS_LOG = Path.home() / "bsp_payroll_timings.jsonl"
+PROFILE_DIR_ENV = "PAYROLL_PROFILE_DIR"
+
+SAMPLE_INTERVAL = 0.01
+
+_current = contextvars.ContextVar("payroll_run", default=None)
+# Names of the stages open in this context; a thread started with a copy of
+# the context nests its stages under the stage that started it
+_open_stages = contextvars.ContextVar("payroll_open_stages", default=())
+_log_lock = threading.Lock()
+
+
+def _proc_status_mb(field):
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def current_rss_mb():
+    """Resident memory of this process right now in MB, or None if unavailable"""
+    rss = _proc_status_mb("VmRSS:")
+    if rss is not None:
+        return rss
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().rss / 2**20
+    except ImportError:
+        return None
+
+
+def peak_rss_mb():
+    """High-water mark of this process's resident memory in MB, or None if unavailable
+
+    On Linux this is the peak since the last stage started, as the
+    per-stage tracking resets the kernel's mark.
+    """
+    peak = _proc_status_mb("VmHWM:")
+    if peak is not None:
+        return peak
+    try:
+        import resource
+    except ImportError:
+        pass
+    else:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reports KB, macOS bytes
+        return peak / 2**20 if peak > 2**32 else peak / 1024
+    try:
+        import psutil
+
+        return psutil.Process().memory_info().peak_wset / 2**20
+    except (ImportError, AttributeError):
+        return None
+
+
+def _reset_peak():
+    """Reset the kernel's high-water mark to current RSS (Linux); False where that is not possible"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return False
+    return True
+
+
+class _PeakTracker:
+    """Peak resident memory of every open stage, across runs and threads
+
+    Where the kernel's high-water mark can be reset, it is folded into all
+    open stages and then reset whenever a stage starts, so each stage sees
+    the peak of its own duration while enclosing and concurrent stages keep
+    theirs. Elsewhere a background thread samples RSS while stages are open.
+    """
+
+    def __init__(self):
+        self._open = []
+        self._lock = threading.Lock()
+        self._resettable = None
+        self._sampler = None
+
+    def _fold(self):
+        value = peak_rss_mb() if self._resettable else current_rss_mb()
+        if value is not None:
+            for record in self._open:
+                record.peak_rss_mb = max(record.peak_rss_mb or 0, value)
+
+    def start(self, record):
+        with self._lock:
+            if self._resettable is not False:
+                self._fold()
+                self._resettable = _reset_peak()
+            record.start_rss_mb = current_rss_mb()
+            record.peak_rss_mb = record.start_rss_mb
+            self._open.append(record)
+            if not self._resettable and self._sampler is None:
+                self._sampler = threading.Thread(target=self._sample, name="peak-rss-sampler", daemon=True)
+                self._sampler.start()
+
+    def finish(self, record):
+        with self._lock:
+            self._fold()
+            self._open.remove(record)
+        if record.peak_rss_mb is not None and record.start_rss_mb is not None:
+            record.peak_growth_mb = record.peak_rss_mb - record.start_rss_mb
+
+    def _sample(self):
+        while True:
+            with self._lock:
+                if not self._open:
+                    self._sampler = None
+                    return
+                self._fold()
+            time.sleep(SAMPLE_INTERVAL)
+
+
+_peaks = _PeakTracker()
+
+
+class Stage:
+    """One timed stage of a run; set ``rows`` inside the ``with`` block once it is known"""
+
+    def __init__(self, name, rows=None):
+        self.name = name
+        self.rows = rows
+        self.seconds = None
+        self.start_rss_mb = None
+        self.peak_rss_mb = None
+        self.peak_growth_mb = None
+
+
+class Run:
+    """Wall time, row counts and peak memory of the stages of one report, export or send
+
+    Code running while the run is active (see ``active``) records stages with
+    the module-level ``stage``. ``finish`` appends one JSON line per stage to
+    ``log_path``. When ``profile_dir`` is set (or PAYROLL_PROFILE_DIR is),
+    the active periods are also profiled with cProfile and the stats dumped
+    there.
+    """
+
+    def __init__(self, name, log_path=DEFAULT_TIMINGS_LOG, profile_dir=None):
+        self.name = name
+        self.id = uuid.uuid4().hex[:12]
+        self.started_at = datetime.now()
+        self.log_path = log_path
+        self.profile_dir = profile_dir or os.getenv(PROFILE_DIR_ENV)
+        self.stages = []
+        self._profiler = cProfile.Profile() if self.profile_dir else None
+        self._start = time.perf_counter()
+        self.seconds = None
+        self.status = None
+
+    @contextmanager
+    def active(self):
+        """Make this the current run in the calling thread, profiling it if enabled"""
+        token = _current.set(self)
+        profiling = False
+        if self._profiler is not None:
+            try:
+                self._profiler.enable()
+                profiling = True
+            except ValueError:
+                # Only one profiler can be active per process; another run has it
+                pass
+        try:
+            yield self
+        finally:
+            if profiling:
+                self._profiler.disable()
+            _current.reset(token)
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        names = _open_stages.get() + (name,)
+        record = Stage(".".join(names), rows)
+        token = _open_stages.set(names)
+        _peaks.start(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record.seconds = time.perf_counter() - start
+            _peaks.finish(record)
+            _open_stages.reset(token)
+            self.stages.append(record)
+
+    def peak_mb(self):
+        """Highest stage peak of the run so far, or the process's current RSS before any stage ends"""
+        peaks = [record.peak_rss_mb for record in self.stages if record.peak_rss_mb is not None]
+        return max(peaks) if peaks else current_rss_mb()
+
+    def finish(self, status="ok"):
+        """Close the run, write its JSON lines and profile; returns the status bar summary"""
+        self.seconds = time.perf_counter() - self._start
+        self.status = status
+        if self.log_path:
+            self._write_log()
+        if self._profiler is not None:
+            target = Path(self.profile_dir)
+            target.mkdir(parents=True, exist_ok=True)
+            slug = "".join(c if c.isalnum() else "_" for c in self.name.lower())
+            self._profiler.dump_stats(target / f"{self.started_at:%Y%m%d_%H%M%S}_{slug}.prof")
+        return self.summary()
+
+    def _write_log(self):
+        common = {"run_id": self.id, "run": self.name, "started_at": self.started_at.isoformat(timespec="seconds")}
+        lines = [
+            {**common, "stage": record.name, "seconds": round(record.seconds, 4), "rows": record.rows,
+             "peak_rss_mb": _rounded(record.peak_rss_mb), "peak_growth_mb": _rounded(record.peak_growth_mb)}
+            for record in self.stages
+        ]
+        lines.append({**common, "stage": "total", "seconds": round(self.seconds, 4), "status": self.status,
+                      "peak_rss_mb": _rounded(self.peak_mb())})
+        path = Path(self.log_path)
+        with _log_lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "a") as f:
+                for line in lines:
+                    f.write(json.dumps(line) + "\n")
+
+    def summary(self):
+        """One-line breakdown of the top-level stages, e.g. for a status bar"""
+        parts = []
+        for record in self.stages:
+            if "." in record.name:
+                continue
+            rows = f" ({record.rows:,} rows)" if record.rows is not None else ""
+            parts.append(f"{record.name} {record.seconds:.2f}s{rows}")
+        total = self.seconds if self.seconds is not None else time.perf_counter() - self._start
+        peak = self.peak_mb()
+        memory = f", peak {peak:,.0f} MB" if peak is not None else ""
+        return " | ".join([f"{self.name}: {total:.2f}s{memory}"] + parts)
+
+
+def _rounded(value):
+    return None if value is None else round(value, 1)
+
+
+def current_run():
+    return _current.get()
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Time a stage of the current run; a no-op record when no run is active"""
+    run = _current.get()
+    if run is None:
+        yield Stage(name, rows)
+        return
+    with run.stage(name, rows) as record:
+        yield record
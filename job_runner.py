@@ -0,0 +1,154 @@
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from instrumentation import DEFAULT_TIMINGS_LOG, Run
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once its cancellation has been requested"""
+
+
+class Job:
+    """Handle passed to a running job for progress reporting and cancellation checks"""
+
+    def __init__(self, key, title, events):
+        self.key = key
+        self.title = title
+        self._events = events
+        self._cancel = threading.Event()
+        self.future = None
+        self.run = None
+        self.show_timings = True
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None:
+            self.future.cancel()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def check_cancelled(self):
+        if self._cancel.is_set():
+            raise JobCancelled(self.title)
+
+    def progress(self, message, fraction=None):
+        """Post a progress update to the UI; also a cancellation point"""
+        self.check_cancelled()
+        self._events.put((self, "progress", (message, fraction)))
+
+
+class JobRunner:
+    """Runs long operations on a thread pool off the Tk mainloop
+
+    Results, errors and progress are queued by the workers and delivered on
+    the Tk thread by polling with ``root.after``, so callbacks may touch
+    widgets freely. Only one job per key runs at a time; submitting a key
+    that is already busy is refused.
+
+    Every job is timed as an ``instrumentation.Run`` covering the job and its
+    completion callback. Its summary is passed to ``on_timings`` when the
+    job ends.
+    """
+
+    POLL_MS = 100
+
+    def __init__(self, root, max_workers=2, on_status=None, on_timings=None, timings_log=DEFAULT_TIMINGS_LOG):
+        self.root = root
+        self.on_status = on_status
+        self.on_timings = on_timings
+        self.timings_log = timings_log
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="payroll-job")
+        self.active = {}
+        self._events = queue.Queue()
+        self._handlers = {}
+        self.root.after(self.POLL_MS, self._poll)
+
+    def busy(self, key):
+        return key in self.active
+
+    def submit(self, key, title, func, *args, on_success=None, on_error=None, on_cancel=None, show_timings=True):
+        """Run ``func(job, *args)`` in the background; returns the Job, or None if ``key`` is busy
+
+        Housekeeping jobs pass ``show_timings=False`` so their timings are
+        logged without replacing the last report's in ``on_timings``.
+        """
+        if key in self.active:
+            return None
+        job = Job(key, title, self._events)
+        job.run = Run(title, log_path=self.timings_log)
+        job.show_timings = show_timings
+        self.active[key] = job
+        self._handlers[job] = (on_success, on_error, on_cancel)
+        self._status(f"{title}...")
+        job.future = self.executor.submit(self._run, job, func, args)
+        return job
+
+    def cancel(self, key=None):
+        """Request cancellation of one job, or of every active job when ``key`` is None"""
+        jobs = list(self.active.values()) if key is None else [self.active.get(key)]
+        for job in jobs:
+            if job is not None:
+                job.cancel()
+                self._status(f"Cancelling {job.title.lower()}...")
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self, job, func, args):
+        try:
+            job.check_cancelled()
+            with job.run.active():
+                result = func(job, *args)
+            job.check_cancelled()
+            self._events.put((job, "done", result))
+        except JobCancelled:
+            self._events.put((job, "cancelled", None))
+        except Exception as e:
+            self._events.put((job, "error", e))
+
+    def _poll(self):
+        try:
+            while True:
+                job, kind, payload = self._events.get_nowait()
+                self._dispatch(job, kind, payload)
+        except queue.Empty:
+            pass
+        # A future cancelled before it started never reaches _run
+        for job in [job for job in self.active.values() if job.future is not None and job.future.cancelled()]:
+            self._dispatch(job, "cancelled", None)
+        self.root.after(self.POLL_MS, self._poll)
+
+    def _dispatch(self, job, kind, payload):
+        if kind == "progress":
+            message, fraction = payload
+            self._status(message if fraction is None else f"{message} ({fraction:.0%})")
+            return
+        if self.active.get(job.key) is job:
+            del self.active[job.key]
+        on_success, on_error, on_cancel = self._handlers.pop(job, (None, None, None))
+        try:
+            with job.run.active():
+                if kind == "done":
+                    self._status(f"{job.title} finished")
+                    if on_success:
+                        on_success(payload)
+                elif kind == "cancelled":
+                    self._status(f"{job.title} cancelled")
+                    if on_cancel:
+                        on_cancel()
+                else:
+                    self._status(f"{job.title} failed")
+                    if on_error:
+                        on_error(payload)
+        finally:
+            summary = job.run.finish({"done": "ok", "cancelled": "cancelled"}.get(kind, "failed"))
+            if self.on_timings and job.show_timings:
+                self.on_timings(summary)
+
+    def _status(self, text):
+        if self.on_status:
+            self.on_status(text)
@@ -0,0 +1,319 @@
+import contextvars
+import csv
+import gzip
+import io
+import os
+import smtplib
+import ssl
+import threading
+import time
+import zipfile
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+from email.message import EmailMessage
+
+import pandas as pd
+
+import pdf_export
+from instrumentation import stage
+
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+# CSV attachments above this size are compressed before sending
+COMPRESS_THRESHOLD = 5 * 1024 * 1024
+
+REPORT_NAMES = {
+    "Generate Count Report": ("Employee_Count_Report", "Employee Count Analysis Report"),
+    "Generate Changes Report": ("Employee_Changes_Report", "Employee Changes Report"),
+    "Generate New Joinee Report": ("New_Joinees_Report", "New Employee Joining Report"),
+}
+DEFAULT_REPORT_NAME = ("Payroll_Report", "Payroll Data Report")
+
+Attachment = namedtuple("Attachment", ["filename", "data", "maintype", "subtype", "label"])
+DeliveryRecord = namedtuple("DeliveryRecord", ["timestamp", "recipient", "rows", "attempts", "status", "error"])
+EMAIL_COLUMN = "EMAIL"
+
+
+def report_names(report_type):
+    """(attachment base name, email subject) for a report option"""
+    return REPORT_NAMES.get(report_type, DEFAULT_REPORT_NAME)
+
+
+def compress(filename, data, compression="zip"):
+    """Wrap ``data`` in a zip archive or gzip stream, returning (filename, bytes, subtype)"""
+    if compression == "gzip":
+        return f"{filename}.gz", gzip.compress(data), "gzip"
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(filename, data)
+    return f"{filename.rsplit('.', 1)[0]}.zip", buffer.getvalue(), "zip"
+
+
+def csv_attachment(df, base_name, compression="zip", compress_threshold=COMPRESS_THRESHOLD):
+    """Report as an in-memory CSV attachment, compressed when larger than the threshold"""
+    buffer = io.BytesIO()
+    df.to_csv(buffer, index=False)
+    filename, data = f"{base_name}.csv", buffer.getvalue()
+    if compression and compress_threshold is not None and len(data) > compress_threshold:
+        filename, data, subtype = compress(filename, data, compression)
+        return Attachment(filename, data, "application", subtype, "CSV")
+    return Attachment(filename, data, "text", "csv", "CSV")
+
+
+def pdf_attachment(df, base_name, progress=None):
+    """Report as an in-memory PDF attachment"""
+    data = pdf_export.render_pdf(df, progress=progress, workers=pdf_export.default_workers())
+    return Attachment(f"{base_name}.pdf", data, "application", "pdf", "PDF")
+
+
+def build_attachments(df, attachment_format, base_name, progress=None, compression="zip",
+                      compress_threshold=COMPRESS_THRESHOLD):
+    """Attachments for one of the "CSV only" / "PDF only" / "Both CSV and PDF" options
+
+    A PDF that fails to render is skipped when a CSV is already attached.
+    """
+    attachments = []
+    if attachment_format in ["CSV only", "Both CSV and PDF"]:
+        with stage("build csv attachment", rows=len(df)):
+            attachments.append(csv_attachment(df, base_name, compression, compress_threshold))
+    if attachment_format in ["PDF only", "Both CSV and PDF"]:
+        try:
+            with stage("build pdf attachment", rows=len(df)):
+                attachments.append(pdf_attachment(df, base_name, progress))
+        except Exception:
+            if not attachments:
+                raise
+    return attachments
+
+
+def build_message(sender_email, recipient_email, email_subject, attachments):
+    """EmailMessage carrying ``attachments`` with the standard report body"""
+    msg = EmailMessage()
+    msg['Subject'] = f'BSP Payroll System - {email_subject}'
+    msg['From'] = sender_email
+    msg['To'] = recipient_email
+
+    formats_included = [attachment.label for attachment in attachments]
+    if len(formats_included) == 2:
+        body = f"""Dear Recipient,
+
+Please find attached the {email_subject} in both CSV and PDF formats.
+
+Regards,
+BSP Payroll Team"""
+    else:
+        format_type = formats_included[0]
+        body = f"""Dear Recipient,
+
+Please find attached the {email_subject} in {format_type} format.
+
+Regards,
+BSP Payroll Team"""
+    msg.set_content(body)
+
+    for attachment in attachments:
+        msg.add_attachment(
+            attachment.data, maintype=attachment.maintype, subtype=attachment.subtype,
+            filename=attachment.filename,
+        )
+    return msg
+
+
+def send_message(msg, sender_email, password, host=SMTP_HOST, port=SMTP_PORT):
+    """Send one message over a fresh SSL connection"""
+    with SmtpSession(sender_email, password, host, port) as session:
+        session.send(msg)
+
+
+class SmtpSession:
+    """One authenticated SMTP connection reused across messages
+
+    The connection is opened on first use and reopened after a failure.
+    ``use_ssl=False`` with no password talks plain SMTP, which is how the
+    bulk sender is pointed at a local stand-in server for testing.
+    """
+
+    def __init__(self, sender_email, password, host=SMTP_HOST, port=SMTP_PORT, use_ssl=True, timeout=60):
+        self.sender_email = sender_email
+        self.password = password
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.server = None
+
+    def connect(self):
+        """Open and authenticate the connection; it is kept only once login succeeds"""
+        with stage("smtp connect"):
+            if self.use_ssl:
+                context = ssl.create_default_context()
+                server = smtplib.SMTP_SSL(self.host, self.port, context=context, timeout=self.timeout)
+            else:
+                server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+            try:
+                if self.password:
+                    server.login(self.sender_email, self.password)
+            except Exception:
+                try:
+                    server.quit()
+                except Exception:
+                    pass
+                raise
+            self.server = server
+
+    def send(self, msg):
+        try:
+            if self.server is None:
+                self.connect()
+            with stage("smtp send"):
+                self.server.send_message(msg)
+        except Exception:
+            self.close()
+            raise
+
+    def close(self):
+        if self.server is not None:
+            try:
+                self.server.quit()
+            except Exception:
+                pass
+            self.server = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def is_permanent_failure(error):
+    """SMTP errors that retrying will not fix (5xx replies and refused addresses)
+
+    Authentication failures count by their code: 535 is a wrong password,
+    while 454 is a temporary server-side problem worth retrying.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return True
+    code = getattr(error, "smtp_code", None)
+    return code is not None and 500 <= code < 600
+
+
+def send_with_retry(session, msg, retries=3, backoff=2.0, sleep=time.sleep):
+    """Send ``msg``, retrying transient failures with exponential backoff
+
+    Returns (attempts, error) where error is None on success.
+    """
+    for attempt in range(1, retries + 2):
+        try:
+            session.send(msg)
+            return attempt, None
+        except Exception as e:
+            if is_permanent_failure(e) or attempt > retries:
+                return attempt, e
+            sleep(backoff * 2 ** (attempt - 1))
+
+
+def load_recipient_mapping(path):
+    """Mapping CSV with an EMAIL column and one key column naming a report column"""
+    mapping = pd.read_csv(path, dtype=str)
+    mapping.columns = mapping.columns.str.strip().str.upper()
+    if EMAIL_COLUMN not in mapping.columns:
+        raise ValueError(f"Recipient mapping must have an {EMAIL_COLUMN} column")
+    keys = [col for col in mapping.columns if col != EMAIL_COLUMN]
+    if len(keys) != 1:
+        raise ValueError(f"Recipient mapping needs exactly one key column besides {EMAIL_COLUMN}")
+    mapping[EMAIL_COLUMN] = mapping[EMAIL_COLUMN].str.strip()
+    return mapping.dropna(subset=[EMAIL_COLUMN]), keys[0]
+
+
+def split_by_recipient(df, mapping=None, key_column=None, email_column=EMAIL_COLUMN):
+    """{recipient: slice of df} from a mapping frame, or from an email column of df itself
+
+    A key may map to several recipients and a recipient may own several keys.
+    """
+    if mapping is None:
+        return {email: rows for email, rows in df.groupby(email_column, sort=True)}
+    if key_column not in df.columns:
+        raise ValueError(f"Report has no {key_column} column to match the recipient mapping")
+    keys = df[key_column].astype(str).str.strip()
+    slices = {}
+    for email, owned in mapping.groupby(EMAIL_COLUMN, sort=True):
+        rows = df[keys.isin(owned[key_column].str.strip())]
+        if len(rows):
+            slices[email] = rows
+    return slices
+
+
+def write_delivery_log(records, log_path):
+    """Append delivery records to a CSV log"""
+    new_file = not os.path.exists(log_path)
+    with open(log_path, "a", newline="") as f:
+        writer = csv.writer(f)
+        if new_file:
+            writer.writerow(DeliveryRecord._fields)
+        writer.writerows(records)
+
+
+def bulk_send(slices, sender_email, password, email_subject, base_name, attachment_format="CSV only",
+              connections=1, retries=3, backoff=2.0, log_path=None, progress=None,
+              host=SMTP_HOST, port=SMTP_PORT, use_ssl=True):
+    """Send each recipient its own slice over ``connections`` reused SMTP sessions
+
+    ``progress(done, total)`` runs on the calling thread after each message;
+    if it raises, unsent messages are abandoned and the error propagates.
+    Returns the DeliveryRecords, which are also appended to ``log_path``.
+    """
+    local = threading.local()
+    sessions = []
+    sessions_lock = threading.Lock()
+    stop = threading.Event()
+
+    def session():
+        if not hasattr(local, "session"):
+            local.session = SmtpSession(sender_email, password, host, port, use_ssl)
+            with sessions_lock:
+                sessions.append(local.session)
+        return local.session
+
+    def deliver(recipient, rows):
+        if stop.is_set():
+            return None
+        try:
+            attachments = build_attachments(rows, attachment_format, base_name)
+            msg = build_message(sender_email, recipient, email_subject, attachments)
+        except Exception as e:
+            attempts, error = 0, e
+        else:
+            attempts, error = send_with_retry(session(), msg, retries, backoff)
+        return DeliveryRecord(
+            datetime.now().isoformat(timespec="seconds"), recipient, len(rows), attempts,
+            "sent" if error is None else "failed", "" if error is None else str(error),
+        )
+
+    records = []
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, connections)) as pool:
+            # Each send runs in a copy of this context so its stages land in the current run
+            futures = [
+                pool.submit(contextvars.copy_context().run, deliver, recipient, rows)
+                for recipient, rows in slices.items()
+            ]
+            try:
+                for done, future in enumerate(as_completed(futures), start=1):
+                    record = future.result()
+                    if record is not None:
+                        records.append(record)
+                    if progress:
+                        progress(done, len(futures))
+            except BaseException:
+                stop.set()
+                for future in futures:
+                    future.cancel()
+                raise
+    finally:
+        for open_session in sessions:
+            open_session.close()
+        if log_path and records:
+            write_delivery_log(records, log_path)
+    return records
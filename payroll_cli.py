@@ -0,0 +1,347 @@
+"""Headless entry point for scheduled payroll report runs
+
+    python payroll_cli.py report changes --master MASTER.csv --changes CHANGES.csv \
+        --out Employee_Changes_Report.pdf --email section.head@example.com
+
+Uses the same comparison, export and email code as the GUI without importing
+tkinter, PIL or (unless a PDF is requested) fpdf. Sender credentials come
+from --sender or EMAIL_USER and from EMAIL_PASS.
+"""
+import argparse
+import os
+import smtplib
+import sqlite3
+import sys
+
+REPORTS = {
+    "count": ("count_report", "Generate Count Report"),
+    "changes": ("changes_report", "Generate Changes Report"),
+    "new-joinee": ("new_joinee_report", "Generate New Joinee Report"),
+}
+DEFAULT_SNAPSHOT_DIR = os.path.join(os.path.expanduser("~"), ".bsp_payroll_snapshots")
+DEFAULT_REPORT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".bsp_payroll_report_cache")
+DEFAULT_HISTORY_DB = os.path.join(os.path.expanduser("~"), "bsp_payroll_history.sqlite3")
+DEFAULT_TIMINGS_LOG = os.path.join(os.path.expanduser("~"), "bsp_payroll_timings.jsonl")
+HISTORY_QUERIES = ("employee", "trend", "repeats", "months")
+EXPORT_FORMATS = ["csv", "csv.gz", "xlsx", "pdf"]
+ATTACHMENTS = {"csv": "CSV only", "pdf": "PDF only", "both": "Both CSV and PDF"}
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="payroll", description="BSP payroll report tool (headless)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    report = commands.add_parser("report", help="generate a report from a master/changes pair")
+    report.add_argument("kind", choices=sorted(REPORTS))
+    report.add_argument("--master", required=True, help="master payroll CSV")
+    report.add_argument("--changes", required=True, help="changes payroll CSV")
+    report.add_argument("--out", action="append", default=[],
+                        help="write the report to this .csv, .csv.gz, .xlsx or .pdf file (repeatable)")
+    report.add_argument("--email", action="append", default=[], help="recipient address (repeatable)")
+    report.add_argument("--sender", default=os.getenv("EMAIL_USER"), help="sender address (default: $EMAIL_USER)")
+    report.add_argument("--attach", choices=sorted(ATTACHMENTS), default="csv", help="attachment format")
+    report.add_argument("--stream", action="store_true", help="force the out-of-core comparison")
+    report.add_argument("--memory-budget", type=int, metavar="MB",
+                        help="memory budget for the out-of-core comparison (default: half of RAM)")
+    report.add_argument("--no-snapshots", action="store_true", help="always parse the CSVs instead of snapshots")
+    report.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR, help="columnar snapshot directory")
+    report.add_argument("--no-cache", action="store_true", help="always rebuild the report instead of reusing a cached one")
+    report.add_argument("--cache-dir", default=DEFAULT_REPORT_CACHE_DIR, help="finished report cache directory")
+    report.add_argument("--history-db", default=DEFAULT_HISTORY_DB, help="change history database")
+    report.add_argument("--no-history", action="store_true", help="do not record a changes report in the history")
+    report.add_argument("--timings-log", default=DEFAULT_TIMINGS_LOG, help="JSON lines file for stage timings")
+    report.add_argument("--profile", metavar="DIR", help="also write a cProfile dump of the run to DIR")
+    report.add_argument("--quiet", action="store_true", help="suppress progress messages")
+
+    snapshot = commands.add_parser("snapshot", help="convert payroll CSVs to columnar snapshots keyed by YYYYMM")
+    snapshot.add_argument("files", nargs="+")
+    snapshot.add_argument("--snapshot-dir", default=DEFAULT_SNAPSHOT_DIR, help="columnar snapshot directory")
+    snapshot.add_argument("--quiet", action="store_true", help="suppress progress messages")
+
+    batch = commands.add_parser("batch", help="run every report for many master/changes pairs in parallel")
+    batch.add_argument("source", help="folder of MASTER/CHANGES files, or a CSV manifest with MASTER and CHANGES columns")
+    batch.add_argument("--out-dir", required=True, help="folder for per-pair exports and batch_summary.csv")
+    batch.add_argument("--format", action="append", choices=EXPORT_FORMATS,
+                       help="export format (repeatable, default csv)")
+    batch.add_argument("--workers", type=int, help="worker processes (default: one per core)")
+    batch.add_argument("--memory-budget", type=int, metavar="MB",
+                       help="per-worker memory budget for the out-of-core comparison (default: half of RAM, shared)")
+    batch.add_argument("--quiet", action="store_true", help="suppress progress messages")
+
+    watch = commands.add_parser("watch", help="process master/changes pairs as they land in a drop folder")
+    watch.add_argument("drop_dir", help="folder the payroll extracts are written to")
+    watch.add_argument("--archive-dir", required=True, help="folder for report outputs and the processed-file ledger")
+    watch.add_argument("--report", action="append", choices=sorted(REPORTS),
+                       help="report to run (repeatable, default all)")
+    watch.add_argument("--format", action="append", choices=EXPORT_FORMATS,
+                       help="archived output format (repeatable, default csv)")
+    watch.add_argument("--email", action="append", default=[], help="recipient address (repeatable)")
+    watch.add_argument("--sender", default=os.getenv("EMAIL_USER"), help="sender address (default: $EMAIL_USER)")
+    watch.add_argument("--attach", choices=sorted(ATTACHMENTS), default="csv", help="attachment format")
+    watch.add_argument("--interval", type=float, default=30, help="seconds between polls")
+    watch.add_argument("--settle", type=float, default=60,
+                       help="seconds a file must be left unmodified before it is read")
+    watch.add_argument("--retries", type=int, default=5, help="times a failed pair is retried")
+    watch.add_argument("--retry-backoff", type=float, default=300,
+                       help="seconds before the first retry of a failed pair, doubled after each failure")
+    watch.add_argument("--ledger", help="processed-file ledger (default: <archive-dir>/.payroll_ledger.json)")
+    watch.add_argument("--memory-budget", type=int, metavar="MB",
+                       help="memory budget for the out-of-core comparison (default: half of RAM)")
+    watch.add_argument("--once", action="store_true", help="poll once and exit (for cron)")
+    watch.add_argument("--quiet", action="store_true", help="suppress progress messages")
+
+    history = commands.add_parser("history", help="query changes recorded from earlier changes reports")
+    history.add_argument("query", choices=HISTORY_QUERIES)
+    history.add_argument("perno", nargs="?", help="UNIT_PERNO (for 'employee')")
+    history.add_argument("--column", help="restrict 'trend' to one column")
+    history.add_argument("--threshold", type=int, default=2, help="minimum months changed (for 'repeats')")
+    history.add_argument("--from", dest="start", metavar="YYYYMM", help="first month to include")
+    history.add_argument("--to", dest="end", metavar="YYYYMM", help="last month to include")
+    history.add_argument("--db", default=DEFAULT_HISTORY_DB, help="change history database")
+    history.add_argument("--out", help="write the result to this .csv, .csv.gz, .xlsx or .pdf file instead of stdout")
+    return parser
+
+
+def _progress(quiet):
+    def report(message, fraction=None):
+        if not quiet:
+            suffix = "" if fraction is None else f" ({fraction:.0%})"
+            print(f"{message}{suffix}", file=sys.stderr)
+    return report
+
+
+def build_report(args, progress):
+    """(report, whether it came from the report cache) for the requested report"""
+    if args.no_cache:
+        return _build_report(args, progress), False
+    from instrumentation import stage
+    from report_cache import ReportCache
+
+    cache = ReportCache(args.cache_dir)
+    with stage("report cache lookup"):
+        key = cache.key(args.master, args.changes, args.kind)
+        df = cache.get(key)
+    if df is not None:
+        progress("Loaded from report cache")
+        return df, True
+    df = _build_report(args, progress)
+    try:
+        with stage("report cache store", rows=len(df)):
+            cache.put(key, df)
+    except OSError as e:
+        progress(f"Report not cached: {e}")
+    return df, False
+
+
+def _build_report(args, progress):
+    import report_engine
+    import streaming_diff
+    from dataset_cache import read_payroll_csv
+    from snapshot_store import SnapshotStore
+
+    store = None if args.no_snapshots else SnapshotStore(args.snapshot_dir)
+    read = read_payroll_csv if store is None else store.read
+    if args.kind == "new-joinee" and not args.stream:
+        # Only the key from the master and a handful of columns from the changes file are needed
+        progress("Reading input columns")
+        master_df = read(args.master, [report_engine.KEY_COLUMN])
+        changes_df = read(args.changes, [report_engine.KEY_COLUMN] + report_engine.NEW_JOINEE_COLUMNS)
+        return report_engine.new_joinee_report(master_df, changes_df)
+
+    options = {"read": read, "streaming": True if args.stream else None, "progress": progress}
+    if store is not None:
+        options["fingerprints"] = store.fingerprints
+    if args.memory_budget:
+        options["memory_budget"] = args.memory_budget * 1024 * 1024
+    diff = streaming_diff.compare_files(args.master, args.changes, **options)
+    return getattr(diff, REPORTS[args.kind][0])()
+
+
+def run_snapshot(args):
+    from snapshot_store import SnapshotStore
+
+    store = SnapshotStore(args.snapshot_dir)
+    for path in args.files:
+        key = store.convert(path)
+        if not args.quiet:
+            print(f"{path} -> {key}", file=sys.stderr)
+    return 0
+
+
+def run_batch(args):
+    import batch_runner
+
+    progress = _progress(args.quiet)
+    pairs = batch_runner.load_pairs(args.source)
+    progress(f"{len(pairs)} pairs found")
+    summary, per_minute = batch_runner.run_batch(
+        pairs, args.out_dir, workers=args.workers, formats=args.format or ["csv"],
+        memory_budget=args.memory_budget and args.memory_budget * 1024 * 1024, progress=progress,
+    )
+    failed = int((summary["STATUS"] != "ok").sum())
+    progress(f"{len(summary) - failed} of {len(summary)} pairs done, {per_minute:.1f} pairs/minute")
+    progress(f"Summary written to {os.path.join(args.out_dir, batch_runner.SUMMARY_FILE)}")
+    return 1 if failed else 0
+
+
+def run_history(args):
+    from change_history import ChangeHistory
+
+    history = ChangeHistory(args.db)
+    period = {"start": args.start, "end": args.end}
+    if args.query == "employee":
+        if not args.perno:
+            raise SystemExit("history employee needs a UNIT_PERNO")
+        df = history.employee_history(args.perno, **period)
+    elif args.query == "trend":
+        df = history.column_trend(args.column, **period)
+    elif args.query == "repeats":
+        df = history.repeat_changes(args.threshold, **period)
+    else:
+        df = history.months()
+    if args.out:
+        from report_export import export_report
+
+        export_report(df, args.out)
+    else:
+        df.to_csv(sys.stdout, index=False)
+    return 0
+
+
+def record_history(args, df, progress, cached=False):
+    from change_history import ChangeHistory, file_period
+
+    if args.no_cache:
+        history = ChangeHistory(args.history_db)
+    else:
+        from report_cache import ReportCache
+
+        # Reuse the cache's remembered file hashes instead of hashing the changes file again
+        history = ChangeHistory(args.history_db, file_hash=ReportCache(args.cache_dir).file_hash)
+    if cached:
+        period = history.recorded_period(args.changes)
+        if period:
+            progress(f"{period} already recorded in {args.history_db}")
+            return
+    period = file_period(args.changes)
+    if period is None:
+        progress("No YYYYMM found; changes not recorded in history")
+        return
+    history.record(period, df, args.master, args.changes)
+    progress(f"Recorded {period} in {args.history_db}")
+
+
+def _email_password(args):
+    password = os.getenv("EMAIL_PASS")
+    if not args.sender or not password:
+        raise SystemExit("Sending email needs --sender (or EMAIL_USER) and EMAIL_PASS")
+    return password
+
+
+def email_reports(args, reports, progress, delivered=None):
+    """Send each report in ``reports`` (report type -> frame) to every --email recipient over one session
+
+    (report type, recipient) pairs in ``delivered`` are skipped, and each
+    message sent is added to it.
+    """
+    import mailer
+
+    if delivered is None:
+        delivered = set()
+    password = _email_password(args)
+    with mailer.SmtpSession(args.sender, password) as session:
+        for report_type, df in reports.items():
+            pending = [recipient for recipient in args.email if (report_type, recipient) not in delivered]
+            if not pending:
+                continue
+            base_name, email_subject = mailer.report_names(report_type)
+            attachments = mailer.build_attachments(df, ATTACHMENTS[args.attach], base_name)
+            for recipient in pending:
+                msg = mailer.build_message(args.sender, recipient, email_subject, attachments)
+                session.send(msg)
+                delivered.add((report_type, recipient))
+                progress(f"Sent {email_subject} to {recipient}")
+
+
+def run_watch(args):
+    from folder_watcher import FolderWatcher
+
+    progress = _progress(args.quiet)
+    if args.email:
+        _email_password(args)
+    watcher = FolderWatcher(
+        args.drop_dir, args.archive_dir,
+        reports=[REPORTS[kind] for kind in args.report or sorted(REPORTS)],
+        formats=args.format or ["csv"],
+        mail=(lambda reports, delivered: email_reports(args, reports, progress, delivered)) if args.email else None,
+        ledger_path=args.ledger, interval=args.interval, settle=args.settle,
+        retries=args.retries, retry_backoff=args.retry_backoff,
+        memory_budget=args.memory_budget and args.memory_budget * 1024 * 1024, progress=progress,
+    )
+    if args.once:
+        processed = watcher.poll()
+        progress(f"{processed} pairs processed")
+        return 0
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        progress("Stopped")
+    return 0
+
+
+def run_report(args):
+    from instrumentation import Run
+
+    progress = _progress(args.quiet)
+    run = Run(f"{args.kind} report", log_path=args.timings_log, profile_dir=args.profile)
+    try:
+        with run.active():
+            _run_report(args, progress)
+    except BaseException:
+        run.finish("failed")
+        raise
+    progress(run.finish())
+    return 0
+
+
+def _run_report(args, progress):
+    df, cached = build_report(args, progress)
+    report_type = REPORTS[args.kind][1]
+    progress(f"{report_type[len('Generate '):]}: {len(df)} rows")
+    if args.kind == "changes" and not args.no_history:
+        from instrumentation import stage
+
+        with stage("record history", rows=len(df)):
+            record_history(args, df, progress, cached)
+
+    from report_export import export_report
+
+    for path in args.out:
+        export_report(df, path, progress=lambda fraction: progress(f"Writing {path}", fraction))
+        progress(f"Saved {path}")
+
+    if args.email:
+        email_reports(args, {report_type: df}, progress)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        if args.command == "report":
+            return run_report(args)
+        if args.command == "snapshot":
+            return run_snapshot(args)
+        if args.command == "batch":
+            return run_batch(args)
+        if args.command == "watch":
+            return run_watch(args)
+        if args.command == "history":
+            return run_history(args)
+    except (OSError, ValueError, KeyError, sqlite3.Error, smtplib.SMTPException) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
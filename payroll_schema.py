@@ -0,0 +1,108 @@
+import re
+
+import numpy as np
+import pandas as pd
+
+# Column kinds and the read_csv dtype each one is parsed as
+KIND_DTYPES = {
+    "identifier": str,      # keep leading zeros, never round-trip through float
+    "code": "category",     # low-cardinality department/grade/status codes
+    "text": str,
+}
+
+COLUMN_KINDS = {
+    "UNIT_PERNO": "identifier",
+    "SAIL_PERNO": "identifier",
+    "PAN": "identifier",
+    "IFSC_CD": "identifier",
+    "BANK_ACNO": "identifier",
+    "BANK_CD": "identifier",
+    "PF_NO": "identifier",
+    "UAN": "identifier",
+    "AADHAAR_NO": "identifier",
+    "DOB": "identifier",
+    "DOJ_SAIL": "identifier",
+    "NAME": "text",
+    "DEPT_CD": "code",
+    "GRADE": "code",
+    "DESG_CD": "code",
+    "CADRE": "code",
+    "UNIT": "code",
+    "SECTION": "code",
+    "CATEGORY": "code",
+    "STATUS": "code",
+    "GENDER": "code",
+}
+
+# Fallback rules for columns not listed above, checked in order
+PATTERN_KINDS = [
+    (re.compile(r".*_(ACNO|NO|PERNO)$"), "identifier"),
+    (re.compile(r".*_(CD|CODE)$"), "code"),
+]
+
+
+def register(column, kind):
+    """Add or override the kind of a payroll column"""
+    if kind not in KIND_DTYPES:
+        raise ValueError(f"Unknown column kind: {kind}")
+    COLUMN_KINDS[column.strip().upper()] = kind
+
+
+def column_kind(column):
+    """Registered kind of a (normalized) column name, or None for inferred columns"""
+    kind = COLUMN_KINDS.get(column)
+    if kind is not None:
+        return kind
+    for pattern, pattern_kind in PATTERN_KINDS:
+        if pattern.match(column):
+            return pattern_kind
+    return None
+
+
+def csv_dtypes(raw_columns):
+    """read_csv ``dtype`` mapping for a header as it appears in the file"""
+    dtypes = {}
+    for raw in raw_columns:
+        kind = column_kind(str(raw).strip().upper())
+        if kind is not None:
+            dtypes[raw] = KIND_DTYPES[kind]
+    return dtypes
+
+
+def downcast_numeric(df):
+    """Shrink unregistered numeric columns in place
+
+    Integer columns, and float columns holding only whole numbers with no
+    missing values, become the smallest integer type that fits. Floats with
+    fractions or gaps stay float64 so pay amounts keep their paise.
+    """
+    for col in df.columns:
+        if column_kind(col) is not None:
+            continue
+        values = df[col]
+        if pd.api.types.is_bool_dtype(values.dtype):
+            continue
+        if pd.api.types.is_integer_dtype(values.dtype):
+            df[col] = pd.to_numeric(values, downcast="integer")
+        elif pd.api.types.is_float_dtype(values.dtype) and len(values) and not values.hasnans:
+            array = values.to_numpy()
+            if np.array_equal(array, np.floor(array)) and np.abs(array).max() < 2**62:
+                df[col] = pd.to_numeric(array.astype(np.int64), downcast="integer")
+    return df
+
+
+def read_csv(path, **kwargs):
+    """pd.read_csv with registered column dtypes applied and numerics downcast
+
+    Column names are left as they appear in the file.
+    """
+    header = pd.read_csv(path, nrows=0).columns
+    if hasattr(path, "seek"):
+        path.seek(0)
+    dtype = csv_dtypes(header)
+    dtype.update(kwargs.pop("dtype", None) or {})
+    chunked = "chunksize" in kwargs or kwargs.get("iterator")
+    result = pd.read_csv(path, dtype=dtype, **kwargs)
+    if chunked:
+        return (downcast_numeric(chunk) for chunk in result)
+    return downcast_numeric(result)
@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+from pathlib import Path
+
+import pandas as pd
+
+from dataset_cache import content_hash, file_signature
+from report_engine import ENGINE_VERSION
+
+DEFAULT_REPORT_CACHE_DIR = Path.home() / ".bsp_payroll_report_cache"
+DEFAULT_SIZE_LIMIT = 2 * 1024 * 1024 * 1024
+HASHES_FILE = "hashes.json"
+
+
+class ReportCache:
+    """Finished report frames on disk, keyed by the contents of both input files
+
+    A key combines content hashes of the master and changes files with the
+    report type and ``report_engine.ENGINE_VERSION``, so a renamed or copied
+    file still hits while an edited file or a changed engine misses. Frames
+    are pickled, which keeps category and string dtypes and the mixed-type
+    OLD_VALUE/NEW_VALUE columns exactly as they were built. File hashes are
+    remembered by path, size and mtime so an unchanged file is read only
+    once. When the directory grows past ``size_limit`` the least recently
+    used reports are deleted.
+    """
+
+    def __init__(self, directory=DEFAULT_REPORT_CACHE_DIR, size_limit=DEFAULT_SIZE_LIMIT):
+        self.directory = Path(directory)
+        self.size_limit = size_limit
+        self._lock = threading.Lock()
+
+    def _load_hashes(self):
+        try:
+            with open(self.directory / HASHES_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_hashes(self, hashes):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{HASHES_FILE}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(hashes, f, indent=1)
+        os.replace(tmp, self.directory / HASHES_FILE)
+
+    def file_hash(self, path):
+        """Content hash of ``path``, hashed again only when its size or mtime changes"""
+        resolved, size, mtime_ns = file_signature(path)
+        with self._lock:
+            known = self._load_hashes().get(resolved)
+        if known is not None and known["size"] == size and known["mtime_ns"] == mtime_ns:
+            return known["hash"]
+        digest = content_hash(resolved)
+        with self._lock:
+            hashes = {
+                source: entry for source, entry in self._load_hashes().items() if os.path.exists(source)
+            }
+            hashes[resolved] = {"size": size, "mtime_ns": mtime_ns, "hash": digest}
+            self._save_hashes(hashes)
+        return digest
+
+    def key(self, master_path, changes_path, report):
+        """Cache key of ``report`` (e.g. "changes") for one master/changes pair"""
+        parts = [self.file_hash(master_path), self.file_hash(changes_path), report, str(ENGINE_VERSION)]
+        return hashlib.blake2b("\0".join(parts).encode(), digest_size=20).hexdigest()
+
+    def _path(self, key):
+        return self.directory / f"{key}.pkl"
+
+    def get(self, key):
+        """Cached frame for ``key``, or None"""
+        path = self._path(key)
+        try:
+            df = pd.read_pickle(path)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # A truncated or foreign file; drop it and rebuild
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            # The mtime doubles as the last-used time for eviction
+            os.utime(path)
+        except OSError:
+            pass
+        return df
+
+    def put(self, key, df):
+        """Store ``df`` under ``key`` and evict down to the size limit"""
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        df.to_pickle(tmp, protocol=5)
+        os.replace(tmp, path)
+        with self._lock:
+            self._evict(keep=path)
+
+    def entries(self):
+        """(path, size, last used) of every cached report, least recently used first"""
+        found = []
+        for path in self.directory.glob("*.pkl"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            found.append((path, stat.st_size, stat.st_mtime))
+        return sorted(found, key=lambda entry: entry[2])
+
+    @property
+    def usage(self):
+        return sum(entry[1] for entry in self.entries())
+
+    def _evict(self, keep=None):
+        entries = self.entries()
+        total = sum(entry[1] for entry in entries)
+        for path, size, _ in entries:
+            if total <= self.size_limit:
+                break
+            # Always keep the report just stored, even if it alone is over the cap
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        """Delete every cached report"""
+        for path, _, _ in self.entries():
+            path.unlink(missing_ok=True)
@@ -0,0 +1,301 @@
+import numpy as np
+import pandas as pd
+
+from instrumentation import stage
+
+# Bump whenever report contents or dtypes change, so cached reports are rebuilt
+ENGINE_VERSION = 1
+KEY_COLUMN = "UNIT_PERNO"
+IGNORED_COLUMNS = ("UNIT_PERNO", "YYYYMM")
+DUPLICATES_SHOWN = 10
+CHANGES_COLUMNS = ["UNIT_PERNO", "COLUMN", "OLD_VALUE", "NEW_VALUE"]
+NEW_JOINEE_COLUMNS = ["SAIL_PERNO", "NAME", "DOB", "DOJ_SAIL", "PAN", "BANK_ACNO", "IFSC_CD"]
+
+
+def shared_columns(master_df, changes_df):
+    """Columns present in both files, in master order, minus the key and period columns"""
+    other = set(changes_df.columns)
+    return [col for col in master_df.columns if col in other and col not in IGNORED_COLUMNS]
+
+
+def _block_kind(old, new):
+    """Group a column pair by how it can be compared as part of a NumPy block"""
+    if isinstance(old.dtype, pd.CategoricalDtype) and isinstance(new.dtype, pd.CategoricalDtype):
+        return "category"
+    if pd.api.types.is_integer_dtype(old.dtype) and pd.api.types.is_integer_dtype(new.dtype):
+        return "object" if old.hasnans or new.hasnans else "int"
+    if pd.api.types.is_bool_dtype(old.dtype) or pd.api.types.is_bool_dtype(new.dtype):
+        return "object"
+    if pd.api.types.is_numeric_dtype(old.dtype) and pd.api.types.is_numeric_dtype(new.dtype):
+        return "float"
+    return "object"
+
+
+def _block_mask(old_block, new_block, kind):
+    """Element-wise changed mask for one block, treating NaN == NaN as unchanged"""
+    if kind in ("int", "category"):
+        return old_block != new_block
+    if kind == "float":
+        return (old_block != new_block) & ~(np.isnan(old_block) & np.isnan(new_block))
+    old_na = pd.isna(old_block)
+    new_na = pd.isna(new_block)
+    with np.errstate(invalid="ignore"):
+        differs = np.asarray(old_block != new_block, dtype=bool)
+    return (differs & ~(old_na | new_na)) | (old_na != new_na)
+
+
+def _category_codes(old, new):
+    """Codes of two categoricals over their shared categories; missing values are -1 on both sides"""
+    categories = old.cat.categories.union(new.cat.categories)
+    old_codes = old.cat.set_categories(categories).cat.codes.to_numpy()
+    new_codes = new.cat.set_categories(categories).cat.codes.to_numpy()
+    # Trailing NaN so that code -1 decodes to a missing value
+    lookup = np.append(categories.to_numpy(dtype=object), np.nan)
+    return old_codes, new_codes, lookup
+
+
+def _aligned_blocks(old_df, new_df, columns):
+    """Yield (positions, kind, old_block, new_block, lookups) for columns grouped by comparison kind
+
+    Categorical pairs are compared as integer codes; ``lookups`` then holds
+    one code-to-value array per block column, otherwise it is None.
+    """
+    groups = {}
+    for pos, col in enumerate(columns):
+        kind = _block_kind(old_df[col], new_df[col])
+        groups.setdefault(kind, []).append(pos)
+    conversions = {
+        "int": {"dtype": np.int64},
+        "float": {"dtype": np.float64, "na_value": np.nan},
+        "object": {"dtype": object},
+    }
+    for kind, positions in groups.items():
+        cols = [columns[pos] for pos in positions]
+        if kind == "category":
+            coded = [_category_codes(old_df[col], new_df[col]) for col in cols]
+            old_block = np.column_stack([codes[0] for codes in coded]).astype(np.int64)
+            new_block = np.column_stack([codes[1] for codes in coded]).astype(np.int64)
+            yield np.asarray(positions), kind, old_block, new_block, [codes[2] for codes in coded]
+            continue
+        old_block = old_df[cols].to_numpy(**conversions[kind])
+        new_block = new_df[cols].to_numpy(**conversions[kind])
+        yield np.asarray(positions), kind, old_block, new_block, None
+
+
+def _cell_values(block, rows, block_cols, lookups):
+    """Values of the given cells of a block as objects, decoding category codes"""
+    values = block[rows, block_cols]
+    if lookups is None:
+        return values.astype(object)
+    decoded = np.empty(len(values), dtype=object)
+    for j, lookup in enumerate(lookups):
+        in_col = block_cols == j
+        decoded[in_col] = lookup[values[in_col]]
+    return decoded
+
+
+def _changed_cells(old_df, new_df, columns):
+    """Column positions, row positions and old/new values of every changed cell
+
+    Cells are ordered by column, then by row.
+    """
+    col_parts, row_parts, old_parts, new_parts = [], [], [], []
+    for positions, kind, old_block, new_block, lookups in _aligned_blocks(old_df, new_df, columns):
+        mask = _block_mask(old_block, new_block, kind)
+        block_cols, rows = np.nonzero(mask.T)
+        if len(rows) == 0:
+            continue
+        col_parts.append(positions[block_cols])
+        row_parts.append(rows)
+        old_parts.append(_cell_values(old_block, rows, block_cols, lookups))
+        new_parts.append(_cell_values(new_block, rows, block_cols, lookups))
+
+    if not col_parts:
+        empty = np.array([], dtype=np.intp)
+        return empty, empty, np.array([], dtype=object), np.array([], dtype=object)
+
+    col_pos = np.concatenate(col_parts)
+    order = np.argsort(col_pos, kind="stable")
+    return (
+        col_pos[order],
+        np.concatenate(row_parts)[order],
+        np.concatenate(old_parts)[order],
+        np.concatenate(new_parts)[order],
+    )
+
+
+def _long_frame(keys, columns, col_pos, rows, old_values, new_values):
+    """Assemble the Changes Report frame from changed-cell arrays"""
+    if len(rows) == 0:
+        return pd.DataFrame(columns=CHANGES_COLUMNS)
+    return pd.DataFrame({
+        "UNIT_PERNO": keys[rows],
+        "COLUMN": np.asarray(columns, dtype=object)[col_pos],
+        "OLD_VALUE": old_values,
+        "NEW_VALUE": new_values,
+    })
+
+
+def diff_frames(old_df, new_df, keys, columns):
+    """Long-format changes between two row-aligned frames
+
+    ``old_df`` and ``new_df`` must have the same length with row ``i`` of each
+    belonging to ``keys[i]``. Output is ordered by column, then by row.
+    """
+    keys = np.asarray(keys)
+    if not columns or len(keys) == 0:
+        return pd.DataFrame(columns=CHANGES_COLUMNS)
+    return _long_frame(keys, columns, *_changed_cells(old_df, new_df, columns))
+
+
+def row_fingerprints(df, columns):
+    """64-bit content hash of each row of ``df`` over ``columns``
+
+    Equal rows always hash equal. Rows that hash differently may still be
+    equal (e.g. the same number stored as int and float), so a fingerprint
+    mismatch only marks a row for the full column comparison.
+    """
+    if not columns:
+        return np.zeros(len(df), dtype=np.uint64)
+    # Payroll text columns are mostly unique, so factorizing them first only adds work
+    return pd.util.hash_pandas_object(df[columns], index=False, categorize=False).to_numpy()
+
+
+def new_joinee_report(master_df, changes_df):
+    """Employees in the changes file that are missing from the master
+
+    Only UNIT_PERNO is read from ``master_df`` and only UNIT_PERNO plus
+    NEW_JOINEE_COLUMNS from ``changes_df``, so callers may pass
+    column-projected frames.
+    """
+    # An index lookup is several times faster than Series.isin on string keys
+    known = pd.Index(master_df[KEY_COLUMN]).unique()
+    joinee_mask = known.get_indexer(changes_df[KEY_COLUMN]) < 0
+    joinee_cols = [col for col in NEW_JOINEE_COLUMNS if col in changes_df.columns]
+    return changes_df.loc[joinee_mask, joinee_cols].reset_index(drop=True)
+
+
+class DuplicateKeyError(ValueError):
+    """UNIT_PERNO values that occur more than once in the master or changes file"""
+
+    def __init__(self, duplicates):
+        self.duplicates = duplicates
+        parts = []
+        for label, keys in duplicates.items():
+            if len(keys):
+                shown = ", ".join(str(key) for key in keys[:DUPLICATES_SHOWN])
+                more = ", ..." if len(keys) > DUPLICATES_SHOWN else ""
+                parts.append(f"{label} file has {len(keys)} duplicated {KEY_COLUMN} values: {shown}{more}")
+        super().__init__("\n".join(parts))
+
+
+def duplicate_keys(df):
+    """UNIT_PERNO values that occur more than once in ``df``, in file order"""
+    keys = df[KEY_COLUMN]
+    return keys[keys.duplicated()].unique().tolist()
+
+
+def key_index(master_df, changes_df):
+    """Hash indexes over UNIT_PERNO of both files
+
+    Raises DuplicateKeyError naming the duplicated keys of both files when
+    either index is not unique, since a join on such keys multiplies rows.
+    """
+    master_index = pd.Index(master_df[KEY_COLUMN])
+    changes_index = pd.Index(changes_df[KEY_COLUMN])
+    if not (master_index.is_unique and changes_index.is_unique):
+        raise DuplicateKeyError({
+            "Master": duplicate_keys(master_df),
+            "Changes": duplicate_keys(changes_df),
+        })
+    return master_index, changes_index
+
+
+class PayrollDiff:
+    """One comparison of a master/changes pair, shared by every report
+
+    Both files are indexed on UNIT_PERNO and aligned by hash lookup once in
+    the constructor, which rejects duplicated keys up front. Aligned rows
+    with equal fingerprints are skipped, so the column comparison only runs
+    on rows that changed. Fingerprints over the shared columns may be passed
+    in precomputed, one per row of each frame. The new-joinee anti-join also
+    runs in the constructor; the report methods are cheap views over the
+    result.
+    """
+
+    def __init__(self, master_df, changes_df, master_fingerprints=None, changes_fingerprints=None):
+        self.columns = shared_columns(master_df, changes_df)
+        self._master_df = master_df
+        self._changes_df = changes_df
+
+        with stage("align keys") as timed:
+            self.master_index, self.changes_index = key_index(master_df, changes_df)
+            changes_rows = self.changes_index.get_indexer(self.master_index)
+            self.master_rows = np.flatnonzero(changes_rows >= 0)
+            changes_rows = changes_rows[self.master_rows]
+            self.keys = self.master_index.to_numpy()[self.master_rows]
+            old_df = master_df[self.columns].iloc[self.master_rows]
+            new_df = changes_df[self.columns].iloc[changes_rows]
+            timed.rows = len(self.master_rows)
+
+        # Only rows whose fingerprints differ can hold a changed cell
+        with stage("fingerprint rows") as timed:
+            if master_fingerprints is None:
+                old_prints = row_fingerprints(old_df, self.columns)
+            else:
+                old_prints = np.asarray(master_fingerprints)[self.master_rows]
+            if changes_fingerprints is None:
+                new_prints = row_fingerprints(new_df, self.columns)
+            else:
+                new_prints = np.asarray(changes_fingerprints)[changes_rows]
+            candidates = np.flatnonzero(old_prints != new_prints)
+            timed.rows = len(candidates)
+        with stage("compare columns") as timed:
+            self.col_pos, rows, self.old_values, self.new_values = _changed_cells(
+                old_df.iloc[candidates], new_df.iloc[candidates], self.columns
+            )
+            self.rows = candidates[rows]
+            timed.rows = len(self.rows)
+
+        with stage("new joinees"):
+            self.new_joinees = new_joinee_report(master_df, changes_df)
+
+    def employee_record(self, key):
+        """COLUMN, OLD_VALUE, NEW_VALUE rows for one employee, or None if the key is in neither file
+
+        Each file is looked up through its UNIT_PERNO hash index; a side the
+        employee is missing from shows as NaN.
+        """
+        if key not in self.master_index and key not in self.changes_index:
+            return None
+        columns = [col for col in self._master_df.columns if col != KEY_COLUMN]
+        columns += [col for col in self._changes_df.columns if col != KEY_COLUMN and col not in columns]
+        sides = []
+        for index, df in ((self.master_index, self._master_df), (self.changes_index, self._changes_df)):
+            if key in index:
+                sides.append(df.iloc[index.get_loc(key)].reindex(columns).to_numpy(dtype=object))
+            else:
+                sides.append(np.full(len(columns), np.nan, dtype=object))
+        return pd.DataFrame({"COLUMN": columns, "OLD_VALUE": sides[0], "NEW_VALUE": sides[1]})
+
+    def count_report(self):
+        """Number of changed employees per column, zero counts excluded"""
+        counts = np.bincount(self.col_pos, minlength=len(self.columns))
+        changed = np.flatnonzero(counts)
+        return pd.DataFrame({
+            "Column": np.asarray(self.columns, dtype=object)[changed],
+            "Count": counts[changed],
+        })
+
+    def changes_report(self):
+        """Long-format UNIT_PERNO, COLUMN, OLD_VALUE, NEW_VALUE rows"""
+        return _long_frame(self.keys, self.columns, self.col_pos, self.rows, self.old_values, self.new_values)
+
+    def new_joinee_report(self):
+        """Employees in the changes file that are missing from the master"""
+        return self.new_joinees.copy()
+
+
+def changes_report(master_df, changes_df):
+    """Field-wise differences for employees present in both files"""
+    return PayrollDiff(master_df, changes_df).changes_report()
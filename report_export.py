@@ -0,0 +1,85 @@
+import gzip
+
+from instrumentation import stage
+
+CSV_CHUNK_ROWS = 100000
+XLSX_CHUNK_ROWS = 20000
+# Excel's sheet limit, including the header row
+EXCEL_MAX_ROWS = 1048576
+SHEET_NAME = "Report"
+
+
+def _open_csv(path, compression):
+    if compression == "gzip" or (compression is None and str(path).lower().endswith(".gz")):
+        return gzip.open(path, "wt", newline="", compresslevel=6)
+    return open(path, "w", newline="")
+
+
+def write_csv(df, path, compression=None, progress=None, chunk_rows=CSV_CHUNK_ROWS):
+    """Write ``df`` as CSV ``chunk_rows`` at a time, gzipped for a .gz path or ``compression="gzip"``
+
+    Only one chunk is formatted in memory at once, and ``progress`` is
+    called with the fraction of rows written after each.
+    """
+    with stage("write csv", rows=len(df)), _open_csv(path, compression) as f:
+        if df.empty:
+            df.to_csv(f, index=False)
+        for start in range(0, len(df), chunk_rows):
+            df.iloc[start:start + chunk_rows].to_csv(f, index=False, header=start == 0)
+            if progress:
+                progress(min(start + chunk_rows, len(df)) / len(df))
+
+
+def sheet_names(rows, max_rows=EXCEL_MAX_ROWS):
+    """Sheet names for ``rows`` data rows: "Report", then "Report (2)" and so on"""
+    sheets = max(1, -(-rows // (max_rows - 1)))
+    return [SHEET_NAME] + [f"{SHEET_NAME} ({i})" for i in range(2, sheets + 1)]
+
+
+def _cell_rows(chunk):
+    """Chunk as lists of plain Python values with missing values as empty cells"""
+    values = chunk.astype(object)
+    return values.where(chunk.notna(), None).to_numpy().tolist()
+
+
+def write_xlsx(df, path, progress=None, max_rows=EXCEL_MAX_ROWS, chunk_rows=XLSX_CHUNK_ROWS):
+    """Write ``df`` as an Excel workbook with openpyxl's write-only mode
+
+    Rows are streamed to the file in chunks, so memory stays flat however
+    large the report is. Reports longer than one sheet continue on further
+    sheets, each with its own header row.
+    """
+    from openpyxl import Workbook
+
+    header = [str(col) for col in df.columns]
+    per_sheet = max_rows - 1
+    with stage("write xlsx", rows=len(df)):
+        workbook = Workbook(write_only=True)
+        for number, name in enumerate(sheet_names(len(df), max_rows)):
+            sheet = workbook.create_sheet(name)
+            sheet.append(header)
+            stop = min((number + 1) * per_sheet, len(df))
+            for start in range(number * per_sheet, stop, chunk_rows):
+                for row in _cell_rows(df.iloc[start:min(start + chunk_rows, stop)]):
+                    sheet.append(row)
+                if progress:
+                    progress(min(start + chunk_rows, stop) / len(df))
+        workbook.save(path)
+
+
+def export_report(df, path, workers=None, progress=None):
+    """Write ``df`` to ``path`` as CSV, gzipped CSV, Excel or PDF depending on the extension
+
+    ``workers`` only applies to PDFs and defaults to ``pdf_export.default_workers()``.
+    """
+    lowered = str(path).lower()
+    if lowered.endswith(".pdf"):
+        import pdf_export
+
+        if workers is None:
+            workers = pdf_export.default_workers()
+        pdf_export.write_pdf(df, path, progress=progress, workers=workers)
+    elif lowered.endswith(".xlsx"):
+        write_xlsx(df, path, progress=progress)
+    else:
+        write_csv(df, path, progress=progress)
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+from tkinter import ttk
+
+
+class VirtualTreeview:
+    """Shows a DataFrame in a ttk.Treeview without creating an item per row
+
+    Only the visible window plus ``BUFFER_ROWS`` on either side exist as tree
+    items. Small scrolls move within that window natively; once the view gets
+    close to its edge the window is re-rendered around the new position. The
+    vertical scrollbar is driven from the DataFrame length, not the item count.
+    Item ids are the row positions in the backing frame.
+    """
+
+    BUFFER_ROWS = 50
+    SAMPLE_ROWS = 500
+    DEFAULT_ROW_HEIGHT = 20
+
+    def __init__(self, tree, scrollbar):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.df = pd.DataFrame()
+        self.start = 0
+        self.end = 0
+        self.offset = 0
+        self.selected = None
+        self._pending = None
+        self.scrollbar.configure(command=self.yview)
+        self.tree.configure(yscrollcommand=self._on_tree_scroll)
+        self.tree.bind("<Configure>", lambda event: self.render(self.offset))
+        self.tree.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.tree.bind("<Home>", lambda event: self.see(0) or "break")
+        self.tree.bind("<End>", lambda event: self.see(len(self.df) - 1) or "break")
+
+    def set_dataframe(self, df):
+        """Replace the backing frame and show it from the top"""
+        self.df = df
+        self.selected = None
+        self.tree.delete(*self.tree.get_children())
+        self.tree["columns"] = list(df.columns)
+        widths = self._column_widths(df)
+        for col in df.columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=widths[col], anchor='center', minwidth=220, stretch=True)
+        self.render(0)
+
+    def _column_widths(self, df):
+        """Pixel widths estimated from an evenly spaced sample of rows"""
+        if len(df) > self.SAMPLE_ROWS:
+            sample = df.iloc[np.linspace(0, len(df) - 1, self.SAMPLE_ROWS).astype(int)]
+        else:
+            sample = df
+        widths = {}
+        for col in df.columns:
+            longest = sample[col].astype(str).str.len().max() if len(sample) else 0
+            max_len = max(0 if pd.isna(longest) else int(longest), len(str(col)))
+            widths[col] = min(max_len * 8, 300)
+        return widths
+
+    def visible_rows(self):
+        """Rows that fit in the tree at its current height"""
+        style_height = ttk.Style().lookup("Treeview", "rowheight")
+        row_height = int(style_height) if style_height else self.DEFAULT_ROW_HEIGHT
+        # One row's worth of height goes to the heading
+        return max(1, self.tree.winfo_height() // row_height - 1)
+
+    def render(self, offset):
+        """Rebuild the item window around ``offset`` and scroll it to the top of the view"""
+        total = len(self.df)
+        visible = self.visible_rows()
+        offset = min(max(0, offset), max(0, total - visible))
+        self.start = max(0, offset - self.BUFFER_ROWS)
+        self.end = min(total, offset + visible + self.BUFFER_ROWS)
+        self.offset = offset
+        self.tree.delete(*self.tree.get_children())
+        if total:
+            rows = self.df.iloc[self.start:self.end].to_numpy(dtype=object).tolist()
+            for pos, row in zip(range(self.start, self.end), rows):
+                self.tree.insert("", "end", iid=str(pos), values=row)
+            if self.selected is not None and self.start <= self.selected < self.end:
+                self.tree.selection_set(str(self.selected))
+                # Keep the focus on the selected row so arrow keys move from it after a re-render
+                self.tree.focus(str(self.selected))
+            self.tree.yview_moveto((offset - self.start) / (self.end - self.start))
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.df)
+        if not total:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        visible = self.visible_rows()
+        self.scrollbar.set(self.offset / total, min(1.0, (self.offset + visible) / total))
+
+    def _on_tree_scroll(self, first, last):
+        """Track native scrolling inside the window and re-render near its edges"""
+        rendered = self.end - self.start
+        if not rendered:
+            return
+        self.offset = self.start + int(round(float(first) * rendered))
+        self._update_scrollbar()
+        visible = self.visible_rows()
+        near_top = self.start > 0 and self.offset - self.start < self.BUFFER_ROWS // 2
+        near_bottom = self.end < len(self.df) and self.end - (self.offset + visible) < self.BUFFER_ROWS // 2
+        if (near_top or near_bottom) and self._pending is None:
+            # Re-rendering from inside the scroll callback would re-enter it
+            self._pending = self.tree.after_idle(self._render_pending)
+
+    def _render_pending(self):
+        self._pending = None
+        self.render(self.offset)
+
+    def yview(self, *args):
+        """Scrollbar command: translate moveto/scroll into a row offset"""
+        total = len(self.df)
+        visible = self.visible_rows()
+        if args[0] == "moveto":
+            target = int(float(args[1]) * total)
+        elif args[0] == "scroll":
+            step = int(args[1]) * (visible if args[2] == "pages" else 1)
+            target = self.offset + step
+        else:
+            return
+        target = min(max(0, target), max(0, total - visible))
+        if self.start <= target and target + visible <= self.end:
+            self.tree.yview_moveto((target - self.start) / (self.end - self.start))
+        else:
+            self.render(target)
+
+    def see(self, position):
+        """Bring row ``position`` of the backing frame into view and select it"""
+        if not 0 <= position < len(self.df):
+            return
+        visible = self.visible_rows()
+        self.selected = position
+        if not (self.offset <= position < self.offset + visible):
+            self.render(position - visible // 2)
+        iid = str(position)
+        self.tree.selection_set(iid)
+        self.tree.focus(iid)
+        self.tree.see(iid)
+
+    def _on_select(self, event=None):
+        selection = self.tree.selection()
+        self.selected = int(selection[0]) if selection else None
+
+    def selected_row(self):
+        """Position of the selected row in the backing frame, or None"""
+        return self.selected
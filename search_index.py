@@ -0,0 +1,70 @@
+import numpy as np
+
+# Joins the cells of a row so one match cannot span two columns
+SEPARATOR = "\x1f"
+
+
+class SearchIndex:
+    """Case-insensitive substring search over every cell of a report
+
+    Each row is flattened once into a lowercase string, so a query is a
+    single vectorized ``str.contains`` instead of a per-cell Python loop.
+    A query that extends the previous one only rescans the previous matches.
+    """
+
+    def __init__(self, df):
+        text = None
+        for col in df.columns:
+            cells = df[col].astype(str).fillna("nan").str.lower()
+            text = cells if text is None else text + SEPARATOR + cells
+        self.text = text.reset_index(drop=True) if text is not None else None
+        self._last_query = None
+        self._last_matches = np.array([], dtype=np.intp)
+
+    def __len__(self):
+        return 0 if self.text is None else len(self.text)
+
+    def search(self, query):
+        """Positions of every row containing ``query``, in row order"""
+        query = query.lower()
+        if not query or self.text is None or SEPARATOR in query:
+            return np.array([], dtype=np.intp)
+        if query == self._last_query:
+            return self._last_matches
+        if self._last_query and query.startswith(self._last_query):
+            candidates = self._last_matches
+            hits = self.text.iloc[candidates].str.contains(query, regex=False).to_numpy(dtype=bool)
+            matches = candidates[hits]
+        else:
+            matches = np.flatnonzero(self.text.str.contains(query, regex=False).to_numpy(dtype=bool))
+        self._last_query, self._last_matches = query, matches
+        return matches
+
+
+class SearchCursor:
+    """Next/previous navigation over the matches of one query"""
+
+    def __init__(self, query="", matches=None):
+        self.query = query
+        self.matches = np.array([], dtype=np.intp) if matches is None else matches
+        self.current = -1
+
+    def __len__(self):
+        return len(self.matches)
+
+    def next(self):
+        if not len(self.matches):
+            return None
+        self.current = (self.current + 1) % len(self.matches)
+        return int(self.matches[self.current])
+
+    def previous(self):
+        if not len(self.matches):
+            return None
+        self.current = (self.current - 1) % len(self.matches)
+        return int(self.matches[self.current])
+
+    def describe(self):
+        if not len(self.matches):
+            return "No matches" if self.query else ""
+        return f"{self.current + 1} of {len(self.matches)}"
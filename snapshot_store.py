@@ -0,0 +1,222 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from dataset_cache import file_signature, read_payroll_csv
+from report_engine import row_fingerprints
+
+DEFAULT_SNAPSHOT_DIR = Path.home() / ".bsp_payroll_snapshots"
+INDEX_FILE = "index.json"
+PERIOD_COLUMN = "YYYYMM"
+
+log = logging.getLogger(__name__)
+
+
+def _has_pyarrow():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def detect_period(df, path):
+    """YYYYMM of a payroll file: the most common YYYYMM value, else six digits in the file name"""
+    if PERIOD_COLUMN in df.columns and df[PERIOD_COLUMN].notna().any():
+        return str(int(df[PERIOD_COLUMN].mode().iloc[0]))
+    match = re.search(r"(20\d{2}(?:0[1-9]|1[0-2]))", os.path.basename(path))
+    return match.group(1) if match else None
+
+
+def detect_kind(path):
+    name = os.path.basename(path).upper()
+    for kind in ("MASTER", "CHANGES"):
+        if kind in name:
+            return kind
+    return "DATA"
+
+
+def text_mixed_columns(df):
+    """``df`` with object columns that mix numbers and text held as text, which Parquet needs
+
+    Large CSVs are parsed in blocks, so one column can come back as ints in
+    some rows and strings in others. Missing values stay missing.
+    """
+    mixed = [
+        col for col in df.columns
+        if df[col].dtype == object and pd.api.types.infer_dtype(df[col], skipna=True) not in ("string", "empty")
+    ]
+    if not mixed:
+        return df
+    df = df.copy(deep=False)
+    for col in mixed:
+        values = df[col]
+        df[col] = values.where(values.isna(), values.astype(str))
+    return df
+
+
+def _write_npy(df, target):
+    """Fallback snapshot: one .npy file per column, numeric ones memory-mappable"""
+    target.mkdir(parents=True, exist_ok=True)
+    for i, col in enumerate(df.columns):
+        values = df[col].to_numpy()
+        if values.dtype.kind not in "biufcmM":
+            values = values.astype(object)
+        np.save(target / f"{i}.npy", values, allow_pickle=values.dtype == object)
+
+
+def _read_npy(target, all_columns, columns):
+    data = {}
+    for col in columns:
+        path = target / f"{all_columns.index(col)}.npy"
+        try:
+            data[col] = np.load(path, mmap_mode="r")
+        except ValueError:
+            # Object columns are pickled and cannot be memory-mapped
+            data[col] = np.load(path, allow_pickle=True)
+    return pd.DataFrame(data, columns=columns)
+
+
+class SnapshotStore:
+    """Columnar snapshots of payroll CSVs, one per file kind and YYYYMM
+
+    A CSV is parsed once and written as Parquet (or per-column .npy files
+    when pyarrow is not installed). Later loads read only the requested
+    columns from the snapshot. An entry records the size and mtime of its
+    source, so a CSV that changes on disk is converted again.
+    """
+
+    def __init__(self, directory=DEFAULT_SNAPSHOT_DIR, fmt=None):
+        self.directory = Path(directory)
+        self.format = fmt or ("parquet" if _has_pyarrow() else "npy")
+        self._lock = threading.Lock()
+
+    def _load_index(self):
+        try:
+            with open(self.directory / INDEX_FILE) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.directory / f"{INDEX_FILE}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(index, f, indent=1)
+        os.replace(tmp, self.directory / INDEX_FILE)
+
+    def entry_for(self, path):
+        """Index entry whose source is the current version of ``path``, or None"""
+        resolved, size, mtime_ns = file_signature(path)
+        with self._lock:
+            index = self._load_index()
+        for key, entry in index.items():
+            if entry["source"] == resolved and entry["size"] == size and entry["mtime_ns"] == mtime_ns:
+                if (self.directory / entry["file"]).exists():
+                    return key, entry
+        return None
+
+    def convert(self, path, df=None):
+        """Snapshot ``path`` (already parsed as ``df`` if given); returns the index key"""
+        resolved, size, mtime_ns = file_signature(path)
+        if df is None:
+            df = read_payroll_csv(resolved)
+        period = detect_period(df, resolved) or Path(resolved).stem
+        key = f"{detect_kind(resolved)}_{period}"
+        with self._lock:
+            existing = self._load_index().get(key)
+        if existing is not None and existing["source"] != resolved:
+            # Another unit's file for the same month already owns the plain key
+            key = f"{key}_{hashlib.sha1(resolved.encode()).hexdigest()[:8]}"
+        fmt = self.format
+        target = self.directory / (f"{key}.parquet" if fmt == "parquet" else key)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            if fmt == "parquet":
+                text_mixed_columns(df).to_parquet(target, index=False)
+            else:
+                _write_npy(df, target)
+        except BaseException:
+            # Leave no half-written snapshot behind; the index still points at the old one, if any
+            if target.is_dir():
+                shutil.rmtree(target, ignore_errors=True)
+            else:
+                target.unlink(missing_ok=True)
+            raise
+        with self._lock:
+            index = self._load_index()
+            index[key] = {
+                "source": resolved, "size": size, "mtime_ns": mtime_ns, "format": fmt,
+                "file": target.name, "columns": list(df.columns), "rows": len(df),
+            }
+            self._save_index(index)
+        return key
+
+    def read_key(self, key, columns=None):
+        """Load the snapshot stored under ``key`` (e.g. ``MASTER_202401``)"""
+        with self._lock:
+            entry = self._load_index()[key]
+        return self._read_entry(entry, columns)
+
+    def _read_entry(self, entry, columns):
+        wanted = entry["columns"] if columns is None else [c for c in columns if c in entry["columns"]]
+        target = self.directory / entry["file"]
+        if entry["format"] == "parquet":
+            return pd.read_parquet(target, columns=wanted)
+        return _read_npy(target, entry["columns"], wanted)
+
+    def read(self, path, columns=None):
+        """Parsed ``path`` restricted to ``columns``, converting it to a snapshot on first use
+
+        Requested columns that the file does not have are skipped. Mixed
+        number/text columns come back as text, as they would from the
+        snapshot. Snapshotting is best effort: if it fails the parsed frame
+        is still returned and the failure logged.
+        """
+        found = self.entry_for(path)
+        if found is None:
+            df = text_mixed_columns(read_payroll_csv(path))
+            try:
+                self.convert(path, df)
+            except Exception as e:
+                log.warning("Could not snapshot %s, using it unsnapshotted: %s", path, e)
+            return df if columns is None else df[[c for c in columns if c in df.columns]]
+        return self._read_entry(found[1], columns)
+
+    def fingerprints(self, path, df, columns):
+        """Row fingerprints of ``df``, parsed from ``path``, over ``columns``
+
+        Fingerprints are saved next to the file's snapshot, so a month that
+        was hashed as the changes file is not hashed again when it becomes
+        next month's master. Files without a snapshot are hashed every time.
+        """
+        found = self.entry_for(path)
+        if found is None:
+            return row_fingerprints(df, columns)
+        key, entry = found
+        target = self.directory / f"{key}.fingerprints.npy"
+        stored = entry.get("fingerprints")
+        if stored is not None and stored["columns"] == list(columns) and target.exists():
+            prints = np.load(target)
+            if len(prints) == len(df):
+                return prints
+
+        prints = row_fingerprints(df, columns)
+        try:
+            np.save(target, prints)
+            with self._lock:
+                index = self._load_index()
+                if key in index and index[key]["file"] == entry["file"]:
+                    index[key]["fingerprints"] = {"file": target.name, "columns": list(columns)}
+                    self._save_index(index)
+        except OSError as e:
+            log.warning("Could not store fingerprints of %s: %s", path, e)
+        return prints
@@ -0,0 +1,236 @@
+import io
+import math
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+import payroll_schema
+from instrumentation import stage
+import report_engine
+from dataset_cache import normalize_columns, read_payroll_csv
+
+# Share of physical RAM the comparison may use before it goes out-of-core
+MEMORY_FRACTION = 0.5
+# Used when the installed RAM cannot be determined
+FALLBACK_MEMORY_BUDGET = 2 * 1024 * 1024 * 1024
+ROW_COLUMN = "__ROW__"
+PROFILE_LINES = 2000
+# Both frames are held alongside the changes rows realigned to the master
+# and the per-block change masks; measured peaks are just under 4x the frames
+WORKING_SET_FACTOR = 4
+
+
+def physical_memory():
+    """Installed RAM in bytes, or None if unavailable"""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        pass
+    try:
+        import psutil
+
+        return psutil.virtual_memory().total
+    except ImportError:
+        return None
+
+
+def default_memory_budget():
+    """``MEMORY_FRACTION`` of physical RAM, or ``FALLBACK_MEMORY_BUDGET`` if that is unknown"""
+    total = physical_memory()
+    return int(total * MEMORY_FRACTION) if total else FALLBACK_MEMORY_BUDGET
+
+
+def _profile(path):
+    """In-memory bytes per CSV byte and per row with schema dtypes, measured on the head of the file"""
+    with open(path, "rb") as f:
+        head = b"".join(line for _, line in zip(range(PROFILE_LINES + 1), f))
+    sample = payroll_schema.read_csv(io.BytesIO(head))
+    rows = max(len(sample), 1)
+    memory = int(sample.memory_usage(deep=True, index=False).sum())
+    return memory / max(len(head), 1), memory / rows
+
+
+def estimated_memory(path):
+    """Rough resident size of ``path`` once parsed into a DataFrame"""
+    per_byte, _ = _profile(path)
+    return int(os.path.getsize(path) * per_byte)
+
+
+def needs_streaming(master_path, changes_path, memory_budget=None):
+    """Whether loading both files whole would exceed ``memory_budget`` (default: ``default_memory_budget()``)"""
+    if memory_budget is None:
+        memory_budget = default_memory_budget()
+    total = estimated_memory(master_path) + estimated_memory(changes_path)
+    return total * WORKING_SET_FACTOR > memory_budget
+
+
+def _partition_of(keys, partitions):
+    hashes = pd.util.hash_pandas_object(keys.astype(str), index=False).to_numpy()
+    return hashes % np.uint64(partitions)
+
+
+def _partition_file(path, workdir, prefix, partitions, chunk_rows):
+    """Hash-partition ``path`` on UNIT_PERNO into ``partitions`` CSV files
+
+    A global row number is written alongside each row so output order can be
+    restored to match the in-memory engine.
+    """
+    paths = [os.path.join(workdir, f"{prefix}_{i:04d}.csv") for i in range(partitions)]
+    written = set()
+    offset = 0
+    for chunk in payroll_schema.read_csv(path, chunksize=chunk_rows):
+        normalize_columns(chunk)
+        row_numbers = pd.DataFrame({ROW_COLUMN: np.arange(offset, offset + len(chunk))}, index=chunk.index)
+        chunk = pd.concat([row_numbers, chunk], axis=1)
+        offset += len(chunk)
+        buckets = _partition_of(chunk[report_engine.KEY_COLUMN], partitions)
+        for part in np.unique(buckets):
+            rows = chunk[buckets == part]
+            rows.to_csv(paths[part], mode="a", header=part not in written, index=False)
+            written.add(part)
+    return [p if i in written else None for i, p in enumerate(paths)]
+
+
+class StreamingDiff:
+    """Out-of-core counterpart of ``report_engine.PayrollDiff``
+
+    Both files are read in chunks and hash-partitioned on UNIT_PERNO into a
+    scratch directory. Matching partitions are then compared one pair at a
+    time, so peak memory is bounded by ``memory_budget`` rather than by the
+    size of the inputs. Results are identical to the in-memory engine, except
+    that column dtypes are inferred per partition rather than per file.
+    """
+
+    def __init__(self, master_path, changes_path, memory_budget=None, workdir=None, progress=None):
+        if memory_budget is None:
+            memory_budget = default_memory_budget()
+        self.memory_budget = memory_budget
+        self.progress = progress
+        master_header = normalize_columns(pd.read_csv(master_path, nrows=0))
+        changes_header = normalize_columns(pd.read_csv(changes_path, nrows=0))
+        self.columns = report_engine.shared_columns(master_header, changes_header)
+
+        total, row_bytes = 0, 1
+        for path in (master_path, changes_path):
+            per_byte, per_row = _profile(path)
+            total += os.path.getsize(path) * per_byte
+            row_bytes = max(row_bytes, per_row)
+        self.partitions = max(1, math.ceil(total * WORKING_SET_FACTOR / memory_budget))
+        chunk_rows = max(1000, int(memory_budget // (WORKING_SET_FACTOR * row_bytes)))
+
+        scratch = tempfile.mkdtemp(prefix="payroll_diff_", dir=workdir)
+        try:
+            with stage("partition files"):
+                master_parts = _partition_file(master_path, scratch, "master", self.partitions, chunk_rows)
+                changes_parts = _partition_file(changes_path, scratch, "changes", self.partitions, chunk_rows)
+            with stage("compare partitions", rows=self.partitions):
+                self._compare(master_parts, changes_parts, master_header, changes_header)
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    def _compare(self, master_parts, changes_parts, master_header, changes_header):
+        counts = np.zeros(len(self.columns), dtype=np.int64)
+        changes, joinees = [], []
+        duplicates = {"Master": [], "Changes": []}
+        master_empty = pd.DataFrame(columns=[*master_header.columns, ROW_COLUMN])
+        for done, (master_part, changes_part) in enumerate(zip(master_parts, changes_parts)):
+            if self.progress:
+                self.progress(done, len(changes_parts))
+            if changes_part is None:
+                if master_part:
+                    keys = payroll_schema.read_csv(master_part, usecols=[report_engine.KEY_COLUMN])
+                    duplicates["Master"] += report_engine.duplicate_keys(keys)
+                continue
+            changes_df = payroll_schema.read_csv(changes_part)
+            master_df = payroll_schema.read_csv(master_part) if master_part else master_empty
+            # Equal keys share a partition, so per-partition checks cover the whole file
+            duplicates["Master"] += report_engine.duplicate_keys(master_df)
+            duplicates["Changes"] += report_engine.duplicate_keys(changes_df)
+            if duplicates["Master"] or duplicates["Changes"]:
+                continue
+            diff = report_engine.PayrollDiff(master_df.drop(columns=ROW_COLUMN), changes_df.drop(columns=ROW_COLUMN))
+            counts += np.bincount(diff.col_pos, minlength=len(self.columns))
+            if len(diff.rows):
+                part_changes = diff.changes_report()
+                part_changes["_COL"] = diff.col_pos
+                part_changes["_ROW"] = master_df[ROW_COLUMN].to_numpy()[diff.master_rows[diff.rows]]
+                changes.append(part_changes)
+            is_joinee = ~changes_df[report_engine.KEY_COLUMN].isin(master_df[report_engine.KEY_COLUMN])
+            joinees.append(changes_df[is_joinee])
+
+        if duplicates["Master"] or duplicates["Changes"]:
+            raise report_engine.DuplicateKeyError(duplicates)
+        self.counts = counts
+        if changes:
+            merged = pd.concat(changes, ignore_index=True).sort_values(["_COL", "_ROW"], kind="stable")
+            self.changes = merged[report_engine.CHANGES_COLUMNS].reset_index(drop=True)
+        else:
+            self.changes = pd.DataFrame(columns=report_engine.CHANGES_COLUMNS)
+        joinee_cols = [col for col in report_engine.NEW_JOINEE_COLUMNS if col in changes_header.columns]
+        if joinees:
+            ordered = pd.concat(joinees, ignore_index=True).sort_values(ROW_COLUMN, kind="stable")
+            self.new_joinees = ordered[joinee_cols].reset_index(drop=True)
+        else:
+            self.new_joinees = changes_header[joinee_cols]
+
+    def count_report(self):
+        """Number of changed employees per column, zero counts excluded"""
+        changed = np.flatnonzero(self.counts)
+        return pd.DataFrame({
+            "Column": np.asarray(self.columns, dtype=object)[changed],
+            "Count": self.counts[changed],
+        })
+
+    def changes_report(self):
+        """Long-format UNIT_PERNO, COLUMN, OLD_VALUE, NEW_VALUE rows"""
+        return self.changes.copy()
+
+    def new_joinee_report(self):
+        """Employees in the changes file that are missing from the master"""
+        return self.new_joinees.copy()
+
+
+def compare_files(master_path, changes_path, read=read_payroll_csv, memory_budget=None,
+                  streaming=None, progress=None, fingerprints=None):
+    """PayrollDiff of two CSVs, or a StreamingDiff when they are too large to load whole
+
+    ``read`` parses one file (e.g. a DatasetCache's ``get``); ``streaming``
+    forces the choice of engine instead of estimating it against
+    ``memory_budget``, which defaults to half of physical RAM. ``progress`` is
+    called as ``progress(message, fraction=None)``. ``fingerprints`` supplies
+    stored row fingerprints as ``fingerprints(path, df, columns)`` (e.g. a
+    SnapshotStore's ``fingerprints``); the in-memory engine hashes rows
+    itself when it is None.
+    """
+    if progress is None:
+        progress = lambda message, fraction=None: None
+    if streaming is None:
+        streaming = needs_streaming(master_path, changes_path, memory_budget)
+    if streaming:
+        progress("Comparing files in partitions")
+        return StreamingDiff(
+            master_path, changes_path, memory_budget=memory_budget,
+            progress=lambda done, total: progress("Comparing partitions", done / total),
+        )
+    progress("Reading input files")
+    with stage("read master") as timed:
+        master_df = read(master_path)
+        timed.rows = len(master_df)
+    with stage("read changes") as timed:
+        changes_df = read(changes_path)
+        timed.rows = len(changes_df)
+    prints = {}
+    if fingerprints is not None:
+        progress("Fingerprinting rows")
+        with stage("stored fingerprints"):
+            columns = report_engine.shared_columns(master_df, changes_df)
+            prints["master_fingerprints"] = fingerprints(master_path, master_df, columns)
+            prints["changes_fingerprints"] = fingerprints(changes_path, changes_df, columns)
+    progress("Comparing files")
+    with stage("compare") as timed:
+        diff = report_engine.PayrollDiff(master_df, changes_df, **prints)
+        timed.rows = len(diff.rows)
+    return diff